@@ -0,0 +1 @@
+# Motor de simulação da clínica ZenithSaúde (sem dependências da interface gráfica)
@@ -0,0 +1,271 @@
+# Linha de comandos do motor de simulação (sem interface gráfica nem matplotlib)
+#
+# Utilização (a partir da pasta Projeto):
+#   python -m zenith run --medicos 4 --taxa 20 --horas 8 --semente 1
+#   python -m zenith run --config cenario.json --saida resultado.json --historico
+#   python -m zenith sweep --medicos 2 3 4 --taxa 10 20 30 --replicacoes 20 --trabalhadores 4 > grelha.csv
+#   python -m zenith replicate --taxa 30 --n 200 --antiteticas --controlo --trabalhadores 4
+#
+# --config lê um JSON com as chaves da configuração (NUM_MEDICOS, TAXA_CHEGADA
+# em doentes/minuto, ...); as opções da linha de comandos sobrepõem-se a ele.
+# TEMPO_MAX_ESPERA e PESOS_PRIORIDADE podem ter só algumas cores (as outras
+# ficam com o valor por omissão); chaves desconhecidas são um erro.
+# A taxa de chegada e o horizonte na linha de comandos usam doentes/hora e
+# horas, como na janela de configurações.
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import sys
+
+from zenith import historico
+from zenith.simulacao import DISTRIBUICOES, LISTAS_EVENTOS, POLITICAS_DESPACHO, config_atual, le_competencias
+
+
+# --- Configuração a partir do ficheiro e das opções
+
+def le_config(caminho):
+    with open(caminho, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"{caminho}: a configuração tem de ser um objeto JSON")
+
+    base = config_atual()
+    desconhecidas = [chave for chave in config if chave not in base]
+    if desconhecidas:
+        raise ValueError(f"{caminho}: chaves desconhecidas: {', '.join(desconhecidas)}")
+
+    # dicionários parciais (ex.: só a paciência dos verdes) completam os valores
+    # por omissão em vez de os substituírem
+    for chave, valor in config.items():
+        if not isinstance(base[chave], dict):
+            continue
+        if not isinstance(valor, dict):
+            raise ValueError(f"{caminho}: {chave} tem de ser um objeto JSON")
+        desconhecidas = [k for k in valor if k not in base[chave]]
+        if desconhecidas:
+            raise ValueError(f"{caminho}: {chave}: chaves desconhecidas: {', '.join(desconhecidas)}")
+        config[chave] = {**base[chave], **valor}
+
+    # null na paciência = sem limite (é assim que a saída JSON escreve o infinito)
+    paciencias = config.get("TEMPO_MAX_ESPERA", {})
+    for cor, paciencia in paciencias.items():
+        if paciencia is None:
+            paciencias[cor] = math.inf
+    return config
+
+def config_dos_argumentos(args):
+    config = le_config(args.config) if args.config else {}
+
+    if args.tempo_consulta is not None:
+        config["TEMPO_MEDIO_CONSULTA"] = args.tempo_consulta
+    if args.distribuicao is not None:
+        config["DISTRIBUICAO_TEMPO_CONSULTA"] = args.distribuicao
+    if args.politica is not None:
+        config["POLITICA_DESPACHO"] = args.politica
+    if args.competencias is not None:
+        config["COMPETENCIAS_MEDICOS"] = le_competencias(args.competencias, config.get("ESPECIALIDADES"))
+    if args.paciencia_aleatoria:
+        config["PACIENCIA_ALEATORIA"] = True
+    if args.triagem_demografica:
+        config["TRIAGEM_DEMOGRAFICA"] = True
+    if args.lista_eventos is not None:
+        config["LISTA_EVENTOS"] = args.lista_eventos
+
+    return config
+
+# valores únicos das opções que no sweep aceitam listas
+def _aplica_grelha(config, medicos=None, taxa=None, horas=None):
+    config = dict(config)
+    if medicos is not None:
+        config["NUM_MEDICOS"] = medicos
+    if taxa is not None:
+        config["TAXA_CHEGADA"] = taxa / 60
+    if horas is not None:
+        config["TEMPO_SIMULACAO"] = horas * 60
+    return config
+
+def resumo(resultados):
+    linha = {"semente": resultados["semente"]}
+    for metrica in historico.METRICAS:
+        linha[metrica] = resultados[metrica]
+    return linha
+
+
+# --- Saída
+
+# Infinity e NaN não são JSON válido (ex.: TEMPO_MAX_ESPERA["vermelho"] ou a
+# média de um grupo vazio na análise): passam a null
+def _sem_infinitos(valor):
+    if isinstance(valor, float):
+        return valor if math.isfinite(valor) else None
+    if isinstance(valor, dict):
+        return {chave: _sem_infinitos(v) for chave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_sem_infinitos(v) for v in valor]
+    return valor
+
+def escreve_json(dados, caminho=None):
+    texto = json.dumps(_sem_infinitos(dados), indent=2, ensure_ascii=False, allow_nan=False)
+    if caminho:
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+def escreve_csv(linhas, caminho=None):
+    if not linhas:
+        return
+    f = open(caminho, "w", encoding="utf-8", newline="") if caminho else sys.stdout
+    try:
+        escritor = csv.DictWriter(f, fieldnames=list(linhas[0]))
+        escritor.writeheader()
+        escritor.writerows(linhas)
+    finally:
+        if caminho:
+            f.close()
+
+
+# --- Subcomandos
+
+def comando_run(args):
+    from zenith.analise import analisa
+    from zenith.simulacao import simula
+
+    config = _aplica_grelha(config_dos_argumentos(args), args.medicos, args.taxa, args.horas)
+    resultados = simula(config, semente=args.semente, verboso=args.verboso, traco=args.traco)
+
+    estatisticas = analisa(resultados)
+    # as chaves (prioridade, especialidade) não são válidas em JSON
+    estatisticas["por_prioridade_especialidade"] = {
+        f"{prio}/{esp}": grupo for (prio, esp), grupo in estatisticas["por_prioridade_especialidade"].items()
+    }
+
+    dados = resumo(resultados)
+    dados["config"] = resultados["config"]
+    dados["ocupacao_medicos"] = {
+        m.id: m.total_tempo_ocupado / resultados["config"]["TEMPO_SIMULACAO"] for m in resultados["medicos"]
+    }
+    dados["analise"] = estatisticas
+
+    if args.historico:
+        dados["execucao_id"] = historico.guarda_execucao(resultados, incluir_doentes=True)
+
+    escreve_json(dados, args.saida)
+    return 0
+
+def comando_sweep(args):
+    from zenith.cache import simula_varios
+
+    base = config_dos_argumentos(args)
+    celulas = list(itertools.product(args.medicos or [None], args.taxa or [None], args.horas or [None]))
+    sementes = range(args.semente, args.semente + args.replicacoes)
+
+    pedidos = []
+    for medicos, taxa, horas in celulas:
+        for semente in sementes:
+            pedidos.append((_aplica_grelha(base, medicos, taxa, horas), semente))
+
+    execucoes = simula_varios(pedidos, args.trabalhadores, usar_cache=not args.sem_cache)
+
+    linhas = []
+    for resultados in execucoes:
+        cfg = resultados["config"]
+        linha = {
+            "num_medicos": cfg["NUM_MEDICOS"],
+            "taxa_hora": cfg["TAXA_CHEGADA"] * 60,
+            "horas": cfg["TEMPO_SIMULACAO"] / 60,
+            "distribuicao": cfg["DISTRIBUICAO_TEMPO_CONSULTA"],
+        }
+        linha.update(resumo(resultados))
+        linhas.append(linha)
+
+    if args.historico:
+        historico.guarda_execucoes(execucoes)
+
+    if args.formato == "json":
+        escreve_json(linhas, args.saida)
+    else:
+        escreve_csv(linhas, args.saida)
+    return 0
+
+def comando_replicate(args):
+    from zenith.replicacoes import replica
+
+    config = _aplica_grelha(config_dos_argumentos(args), args.medicos, args.taxa, args.horas)
+    estimativa = replica(
+        config,
+        n=args.n,
+        semente=args.semente,
+        antiteticas=args.antiteticas,
+        variaveis_controlo=args.controlo,
+        trabalhadores=args.trabalhadores,
+        usar_cache=not args.sem_cache,
+    )
+    escreve_json(estimativa, args.saida)
+    return 0
+
+
+# --- Argumentos
+
+def _opcoes_config(parser, listas=False):
+    numero = "+" if listas else None
+    parser.add_argument("--config", metavar="FICHEIRO", help="JSON com as chaves da configuração")
+    parser.add_argument("--medicos", type=int, nargs=numero, help="número de médicos")
+    parser.add_argument("--taxa", type=float, nargs=numero, help="taxa de chegada (doentes/hora)")
+    parser.add_argument("--horas", type=float, nargs=numero, help="horizonte da simulação (horas)")
+    parser.add_argument("--tempo-consulta", type=float, help="tempo médio de consulta (minutos)")
+    parser.add_argument("--distribuicao", choices=DISTRIBUICOES, help="distribuição do tempo de consulta")
+    parser.add_argument("--politica", choices=POLITICAS_DESPACHO, help="política de despacho")
+    parser.add_argument("--competencias", metavar="TEXTO", help='ex.: "cardiologia+ortopedia; neurologia"')
+    parser.add_argument("--paciencia-aleatoria", action="store_true", help="paciência exponencial")
+    parser.add_argument("--triagem-demografica", action="store_true",
+                        help="especialidade e cor condicionadas à idade e ao sexo")
+    parser.add_argument("--lista-eventos", choices=LISTAS_EVENTOS, help="implementação da lista de eventos futuros")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", metavar="FICHEIRO", help="escreve no ficheiro em vez do stdout")
+
+def cria_parser():
+    parser = argparse.ArgumentParser(prog="python -m zenith", description="Simulação ZenithSaúde sem interface gráfica")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    run = sub.add_parser("run", help="uma execução, com métricas e percentis em JSON")
+    _opcoes_config(run)
+    run.add_argument("--traco", metavar="FICHEIRO", help="grava o traço binário dos eventos")
+    run.add_argument("--historico", action="store_true", help="guarda a execução no histórico SQLite")
+    run.add_argument("--verboso", action="store_true", help="mostra cada evento")
+    run.set_defaults(funcao=comando_run)
+
+    sweep = sub.add_parser("sweep", help="grelha de configurações × sementes")
+    _opcoes_config(sweep, listas=True)
+    sweep.add_argument("--replicacoes", type=int, default=1, help="sementes por célula")
+    sweep.add_argument("--trabalhadores", type=int, default=1)
+    sweep.add_argument("--formato", choices=["csv", "json"], default="csv")
+    sweep.add_argument("--sem-cache", action="store_true")
+    sweep.add_argument("--historico", action="store_true", help="guarda as execuções no histórico SQLite")
+    sweep.set_defaults(funcao=comando_sweep)
+
+    replicate = sub.add_parser("replicate", help="média e IC95 com replicações")
+    _opcoes_config(replicate)
+    replicate.add_argument("--n", type=int, default=100, help="número de execuções")
+    replicate.add_argument("--antiteticas", action="store_true")
+    replicate.add_argument("--controlo", action="store_true", help="variáveis de controlo")
+    replicate.add_argument("--trabalhadores", type=int, default=1)
+    replicate.add_argument("--sem-cache", action="store_true")
+    replicate.set_defaults(funcao=comando_replicate)
+
+    return parser
+
+def main(argumentos=None):
+    args = cria_parser().parse_args(argumentos)
+    try:
+        return args.funcao(args)
+    except (OSError, ValueError, KeyError, TypeError) as erro:
+        print(f"erro: {erro}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+# Análise dos resultados de uma execução com NumPy
+#
+# As médias escondem a cauda, que é o que importa clinicamente. analisa()
+# converte estado_doentes e historico_fila em arrays uma única vez e calcula:
+#   - a fila média ponderada pelo tempo e a distribuição do tamanho da fila
+#     (fração do tempo com 0, 1, 2, ... doentes em espera);
+#   - percentis (p50/p90/p99) do tempo de espera e do tempo na clínica por
+#     prioridade, por especialidade e por prioridade × especialidade;
+#   - taxas de desistência nos mesmos grupos.
+#
+# O tempo de espera é o de quem chegou a ser atendido (como media_espera) e o
+# tempo na clínica o de quem saiu atendido (como media_sistema).
+
+import numpy as np
+
+from zenith.simulacao import PRIORIDADES, calcula_fila_media_tempo
+
+PERCENTIS = (50, 90, 99)
+
+
+# --- Fila
+
+def arrays_fila(historico_fila):
+    if not historico_fila:
+        return np.zeros(0), np.zeros(0, dtype=int)
+    tempos, tamanhos = zip(*historico_fila)
+    return np.asarray(tempos, dtype=float), np.asarray(tamanhos, dtype=int)
+
+# tempo passado com cada tamanho de fila (índice = tamanho) a dividir pelo
+# horizonte, como em calcula_fila_media_tempo, para que a média desta
+# distribuição seja fila_media: antes do primeiro registo a fila está vazia e
+# depois do último fica com o último tamanho até ao horizonte. O histórico pode
+# ir além do horizonte (saídas e desistências depois do fecho das chegadas);
+# esse tempo também conta, como em fila_media, e as frações somam então um
+# pouco mais do que 1.
+def distribuicao_fila(tempos, tamanhos, tempo_simulacao):
+    if len(tempos) == 0:
+        return np.ones(1)
+    duracoes = np.append(np.diff(tempos), max(0.0, tempo_simulacao - tempos[-1]))
+    distribuicao = np.bincount(tamanhos, weights=duracoes)
+    distribuicao[0] += min(tempos[0], tempo_simulacao)
+    return distribuicao / tempo_simulacao
+
+
+# --- Doentes
+
+def arrays_doentes(estado_doentes):
+    n = len(estado_doentes)
+    chegada = np.empty(n)
+    inicio = np.empty(n)
+    saida = np.empty(n)
+    prioridade = np.empty(n, dtype=object)
+    especialidade = np.empty(n, dtype=object)
+    estado = np.empty(n, dtype=object)
+
+    for i, d in enumerate(estado_doentes.values()):
+        chegada[i] = d["chegada"]
+        inicio[i] = np.nan if d["inicio"] is None else d["inicio"]
+        saida[i] = np.nan if d["saida"] is None else d["saida"]
+        prioridade[i] = d["prioridade"]
+        especialidade[i] = d["especialidade"]
+        estado[i] = d["estado"]
+
+    return {
+        "espera": inicio - chegada,
+        "sistema": np.where(estado == "Atendido", saida - chegada, np.nan),
+        "desistiu": estado == "Desistiu",
+        "prioridade": prioridade,
+        "especialidade": especialidade,
+    }
+
+def resumo_valores(valores, percentis=PERCENTIS):
+    valores = valores[~np.isnan(valores)]
+    resumo = {"n": int(len(valores))}
+    if len(valores):
+        resumo["media"] = float(valores.mean())
+        for p, v in zip(percentis, np.percentile(valores, percentis)):
+            resumo[f"p{p}"] = float(v)
+    else:
+        resumo["media"] = None
+        for p in percentis:
+            resumo[f"p{p}"] = None
+    return resumo
+
+# agrupa por uma ou mais colunas: um único argsort e cortes nas fronteiras dos grupos
+def _por_grupo(dados, chaves, percentis):
+    n = len(dados["espera"])
+    if n == 0:
+        return {}
+
+    codigos = np.zeros(n, dtype=np.int64)
+    for chave in chaves:
+        valores, codigo = np.unique(dados[chave].astype(str), return_inverse=True)
+        codigos = codigos * len(valores) + codigo
+
+    ordem = np.argsort(codigos, kind="stable")
+    fronteiras = np.flatnonzero(np.diff(codigos[ordem])) + 1
+    grupos = {}
+
+    for indices in np.split(ordem, fronteiras):
+        primeiro = indices[0]
+        nome = tuple(str(dados[chave][primeiro]) for chave in chaves)
+        desistiu = dados["desistiu"][indices]
+        grupos[nome if len(nome) > 1 else nome[0]] = {
+            "doentes": int(len(indices)),
+            "desistencias": int(desistiu.sum()),
+            "taxa_desistencia": float(desistiu.mean()),
+            "espera": resumo_valores(dados["espera"][indices], percentis),
+            "sistema": resumo_valores(dados["sistema"][indices], percentis),
+        }
+
+    return grupos
+
+# vermelho, amarelo, verde (e depois a especialidade, nos grupos compostos)
+def _ordena_prioridades(grupos):
+    def chave(item):
+        nome = item[0] if isinstance(item[0], tuple) else (item[0],)
+        return (PRIORIDADES.get(nome[0], len(PRIORIDADES)),) + nome[1:]
+    return dict(sorted(grupos.items(), key=chave))
+
+
+def analisa(resultados, percentis=PERCENTIS):
+    tempo_simulacao = resultados["config"]["TEMPO_SIMULACAO"]
+    tempos, tamanhos = arrays_fila(resultados["historico_fila"])
+    dados = arrays_doentes(resultados["estado_doentes"])
+
+    total = len(dados["espera"])
+    return {
+        "fila_media": calcula_fila_media_tempo(resultados["historico_fila"], tempo_simulacao),
+        "distribuicao_fila": distribuicao_fila(tempos, tamanhos, tempo_simulacao).tolist(),
+        "doentes": total,
+        "taxa_desistencia": float(dados["desistiu"].mean()) if total else 0,
+        "espera": resumo_valores(dados["espera"], percentis),
+        "sistema": resumo_valores(dados["sistema"], percentis),
+        "por_prioridade": _ordena_prioridades(_por_grupo(dados, ["prioridade"], percentis)),
+        "por_especialidade": _por_grupo(dados, ["especialidade"], percentis),
+        "por_prioridade_especialidade": _ordena_prioridades(_por_grupo(dados, ["prioridade", "especialidade"], percentis)),
+    }
@@ -0,0 +1,311 @@
+# Benchmark do motor de simulação
+#
+# Utilização (a partir da pasta Projeto):
+#   python -m zenith.benchmark                              -> mostra os resultados
+#   python -m zenith.benchmark --guardar base.json          -> guarda uma baseline em JSON
+#   python -m zenith.benchmark --comparar base.json         -> compara com uma baseline
+#   python -m zenith.benchmark --rapido                     -> matriz reduzida
+#
+# Cada célula da matriz corre num processo próprio para que o pico de memória
+# (RSS) medido pertença apenas a essa configuração.
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import sys
+import time
+import timeit
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from zenith import simulacao
+from zenith.eventos import LISTAS_EVENTOS
+from zenith.simulacao import (
+    DISTRIBUICOES,
+    FilaEspera,
+    Medico,
+    bits_especialidades,
+    simula,
+    calcula_fila_media_tempo,
+    gera_intervalo_tempo_chegada,
+)
+
+# --- Matriz de configurações
+
+TAXAS = [10, 20, 40]                 # doentes/hora
+MEDICOS = [3, 10]
+HORIZONTES = [8, 12]                 # horas
+
+TAXAS_RAPIDO = [10, 40]
+MEDICOS_RAPIDO = [3, 10]
+HORIZONTES_RAPIDO = [8]
+DISTRIBUICOES_RAPIDO = ["exponential"]
+
+REPETICOES = 5
+TOLERANCIA = 0.20    # 20% de margem antes de assinalar uma regressão
+
+# métricas em que "maior" é pior (as restantes, como eventos/s, "menor" é pior)
+METRICAS_MAIOR_PIOR = ["tempo_s", "rss_pico_mb", "alocacoes_pico_mb", "blocos_alocados"]
+METRICAS_MENOR_PIOR = ["eventos_s", "chamadas_s"]
+
+
+def nome_celula(taxa, medicos, horas, dist):
+    return f"taxa={taxa}/h medicos={medicos} horizonte={horas}h dist={dist}"
+
+def config_celula(taxa, medicos, horas, dist):
+    return {
+        "TAXA_CHEGADA": taxa / 60,
+        "NUM_MEDICOS": medicos,
+        "TEMPO_SIMULACAO": horas * 60,
+        "DISTRIBUICAO_TEMPO_CONSULTA": dist,
+    }
+
+def rss_pico_mb():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":   # em macOS vem em bytes, em Linux em KB
+        return pico / (1024 * 1024)
+    return pico / 1024
+
+
+# --- Medição de uma célula (corre num processo filho)
+
+def mede_celula(config, repeticoes):
+    tempos = []
+    eventos = 0
+
+    for r in range(repeticoes):
+        inicio = time.perf_counter()
+        resultados = simula(config, semente=r, verboso=False)
+        tempos.append(time.perf_counter() - inicio)
+        eventos += resultados["num_eventos"]
+
+    # blocos e RSS medidos sem o tracemalloc, que tem as suas próprias alocações
+    resultados = None
+    blocos_antes = sys.getallocatedblocks()
+    resultados = simula(config, semente=0, verboso=False)
+    blocos = sys.getallocatedblocks() - blocos_antes
+    rss = rss_pico_mb()
+    resultados = None
+
+    # última passagem só para o pico de alocações (o tracemalloc torna tudo mais lento)
+    tracemalloc.start()
+    resultados = simula(config, semente=0, verboso=False)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tempos.sort()
+    return {
+        "tempo_s": tempos[len(tempos) // 2],
+        "eventos_s": eventos / sum(tempos) if sum(tempos) > 0 else 0,
+        "eventos_por_execucao": eventos / repeticoes,
+        "rss_pico_mb": rss,
+        "alocacoes_pico_mb": pico / (1024 * 1024),
+        "blocos_alocados": blocos,
+    }
+
+def corre_matriz(rapido=False, repeticoes=REPETICOES):
+    if rapido:
+        matriz = itertools.product(TAXAS_RAPIDO, MEDICOS_RAPIDO, HORIZONTES_RAPIDO, DISTRIBUICOES_RAPIDO)
+    else:
+        matriz = itertools.product(TAXAS, MEDICOS, HORIZONTES, DISTRIBUICOES)
+
+    resultados = {}
+    contexto = multiprocessing.get_context("spawn")
+
+    for taxa, medicos, horas, dist in matriz:
+        nome = nome_celula(taxa, medicos, horas, dist)
+        # um processo novo por célula para isolar o pico de RSS
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as ex:
+            medida = ex.submit(mede_celula, config_celula(taxa, medicos, horas, dist), repeticoes).result()
+        resultados[nome] = medida
+        print(
+            f"{nome:55s} | {medida['tempo_s'] * 1000:8.2f} ms | "
+            f"{medida['eventos_s']:10.0f} eventos/s | "
+            f"RSS {medida['rss_pico_mb']:6.1f} MB | "
+            f"alocações {medida['alocacoes_pico_mb']:6.2f} MB"
+        )
+
+    return resultados
+
+
+# --- Micro-benchmarks
+
+def micro_fila_espera_escolhe(tamanhos=(10, 100, 1000)):
+    resultados = {}
+    gerador = random.Random(0)
+    bits = bits_especialidades(simulacao.ESPECIALIDADES)
+    medico = Medico("m0", "cardiologia", ["cardiologia", "ortopedia"], bits["cardiologia"] | bits["ortopedia"])
+
+    for n in tamanhos:
+        fila = FilaEspera(simulacao.ESPECIALIDADES)
+        especialidade = {}
+        for i in range(n):
+            especialidade[f"d{i}"] = gerador.choice(simulacao.ESPECIALIDADES)
+            fila.entra(gerador.randint(0, 2), float(i), f"d{i}", especialidade[f"d{i}"])
+
+        # retira o melhor e volta a inseri-lo na mesma especialidade, para a
+        # fila manter o tamanho e a mistura de especialidades
+        def passo():
+            escolhido = fila.escolhe(medico)
+            if escolhido:
+                prio, t, did = escolhido
+                fila.entra(prio, t, did, especialidade[did])
+
+        numero, tempo = timeit.Timer(passo).autorange()
+        resultados[f"FilaEspera.escolhe n={n}"] = {"chamadas_s": numero / tempo}
+
+    return resultados
+
+# o caminho do motor com desistências: em cada passo chega um doente, o mais
+# antigo desiste (sai() deixa a entrada no heap) e o médico chama o seguinte,
+# pelo que escolhe() também descarta as entradas de quem já desistiu
+def micro_fila_espera_desistencias(tamanhos=(10, 100, 1000)):
+    resultados = {}
+    gerador = random.Random(0)
+    bits = bits_especialidades(simulacao.ESPECIALIDADES)
+    medico = Medico("m0", "cardiologia", list(simulacao.ESPECIALIDADES), sum(bits.values()))
+
+    for n in tamanhos:
+        fila = FilaEspera(simulacao.ESPECIALIDADES)
+        proximo = [0]
+
+        def chega():
+            i = proximo[0]
+            proximo[0] += 1
+            fila.entra(gerador.randint(0, 2), float(i), i, gerador.choice(simulacao.ESPECIALIDADES))
+
+        for _ in range(n):
+            chega()
+
+        def passo():
+            chega()
+            chega()
+            fila.sai(next(iter(fila.em_fila)))
+            fila.escolhe(medico)
+
+        numero, tempo = timeit.Timer(passo).autorange()
+        resultados[f"FilaEspera com desistências n={n}"] = {"chamadas_s": numero / tempo}
+
+    return resultados
+
+def micro_calcula_fila_media_tempo(tamanhos=(1000, 100000)):
+    resultados = {}
+    gerador = random.Random(0)
+
+    for n in tamanhos:
+        historico = [(float(i), gerador.randint(0, 20)) for i in range(n)]
+        numero, tempo = timeit.Timer(lambda: calcula_fila_media_tempo(historico, n)).autorange()
+        resultados[f"calcula_fila_media_tempo n={n}"] = {"chamadas_s": numero / tempo}
+
+    return resultados
+
+# modelo "hold": n eventos pendentes; cada passo retira o próximo e agenda um
+# novo a uma distância exponencial, mantendo o tamanho da lista
+def micro_lista_eventos(tamanhos=(100, 10000, 200000)):
+    resultados = {}
+
+    for nome, classe in LISTAS_EVENTOS.items():
+        for n in tamanhos:
+            gerador = random.Random(0)
+            lista = classe()
+            for i in range(n):
+                lista.agenda(gerador.expovariate(1.0), simulacao.SAIDA, i)
+
+            def passo():
+                tempo, tipo, _, doente = lista.retira()
+                lista.agenda(tempo + gerador.expovariate(1.0), tipo, doente)
+
+            numero, tempo = timeit.Timer(passo).autorange()
+            resultados[f"lista de eventos {nome} n={n}"] = {"chamadas_s": numero / tempo}
+
+    return resultados
+
+def micro_gera_intervalo_tempo_chegada():
+    numero, tempo = timeit.Timer(lambda: gera_intervalo_tempo_chegada(simulacao.TAXA_CHEGADA)).autorange()
+    return {"gera_intervalo_tempo_chegada": {"chamadas_s": numero / tempo}}
+
+def corre_micro():
+    resultados = {}
+    resultados.update(micro_fila_espera_escolhe())
+    resultados.update(micro_fila_espera_desistencias())
+    resultados.update(micro_calcula_fila_media_tempo())
+    resultados.update(micro_lista_eventos())
+    resultados.update(micro_gera_intervalo_tempo_chegada())
+
+    for nome, medida in resultados.items():
+        print(f"{nome:55s} | {medida['chamadas_s']:12.0f} chamadas/s")
+
+    return resultados
+
+
+# --- Baselines em JSON
+
+def guarda_baseline(resultados, caminho):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+def carrega_baseline(caminho):
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def compara(atual, base, tolerancia=TOLERANCIA):
+    regressoes = []
+
+    for grupo in ("simulacao", "micro"):
+        for nome, medida in atual.get(grupo, {}).items():
+            anterior = base.get(grupo, {}).get(nome)
+            if anterior is None:
+                continue
+
+            for metrica, valor in medida.items():
+                ref = anterior.get(metrica)
+                if not ref:
+                    continue
+                variacao = (valor - ref) / ref
+
+                if metrica in METRICAS_MAIOR_PIOR and variacao > tolerancia:
+                    regressoes.append((nome, metrica, ref, valor, variacao))
+                elif metrica in METRICAS_MENOR_PIOR and variacao < -tolerancia:
+                    regressoes.append((nome, metrica, ref, valor, variacao))
+
+    return regressoes
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark do motor de simulação ZenithSaúde")
+    parser.add_argument("--rapido", action="store_true", help="usa uma matriz reduzida")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES)
+    parser.add_argument("--sem-micro", action="store_true", help="não corre os micro-benchmarks")
+    parser.add_argument("--guardar", metavar="FICHEIRO", help="guarda os resultados como baseline JSON")
+    parser.add_argument("--comparar", metavar="FICHEIRO", help="compara com uma baseline JSON")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    args = parser.parse_args(argumentos)
+
+    resultados = {
+        "maquina": {"python": platform.python_version(), "plataforma": platform.platform()},
+        "simulacao": corre_matriz(args.rapido, args.repeticoes),
+        "micro": {} if args.sem_micro else corre_micro(),
+    }
+
+    if args.guardar:
+        guarda_baseline(resultados, args.guardar)
+        print(f"\nBaseline guardada em {args.guardar}")
+
+    if args.comparar:
+        regressoes = compara(resultados, carrega_baseline(args.comparar), args.tolerancia)
+        if regressoes:
+            print(f"\n{len(regressoes)} regressões acima de {args.tolerancia:.0%}:")
+            for nome, metrica, ref, valor, variacao in regressoes:
+                print(f"  • {nome} | {metrica}: {ref:.4g} -> {valor:.4g} ({variacao:+.1%})")
+            return 1
+        print(f"\nSem regressões acima de {args.tolerancia:.0%}.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+# Cache em disco dos resultados de simula()
+#
+# Cada resultado fica num ficheiro <chave>.pkl, em que a chave é o SHA-256 da
+# configuração completa, da semente, da versão do motor e das pessoas de
+# pessoas.json carregadas pelo motor (de onde saem os doentes e os médicos),
+# para que editar esse ficheiro não devolva resultados antigos. O índice (indice.db,
+# SQLite) guarda apenas metadados (tamanho, criação, último acesso) para que a
+# remoção LRU não tenha de abrir os resultados. Cada acesso altera só a sua
+# linha, e o SQLite serializa as escritas de vários processos (ex.: a interface
+# e a linha de comandos com a mesma cache) sem que uns apaguem as dos outros.
+#
+# Só execuções com semente são guardadas: sem semente o resultado não é
+# reprodutível e não faz sentido reutilizá-lo.
+
+import copy
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from zenith import simulacao
+from zenith.simulacao import PASTA_PROJETO, VERSAO_MOTOR, prepara_config, simula
+
+PASTA_CACHE = os.path.join(PASTA_PROJETO, ".cache_simulacoes")
+TAMANHO_MAX_CACHE = 200 * 1024 * 1024   # 200 MB
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS entradas (
+    chave TEXT PRIMARY KEY,
+    tamanho INTEGER NOT NULL,
+    criado REAL NOT NULL,
+    ultimo_acesso REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entradas_acesso ON entradas (ultimo_acesso);
+"""
+
+
+# pessoas.json só é lido quando o motor é importado, por isso basta calcular uma vez
+@lru_cache(maxsize=None)
+def resumo_pessoas():
+    texto = json.dumps(simulacao.pessoas, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+def chave_cache(config, semente):
+    cfg = prepara_config(config)
+    texto = json.dumps(
+        {"config": cfg, "semente": semente, "versao": VERSAO_MOTOR, "pessoas": resumo_pessoas()},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+class CacheResultados:
+    def __init__(self, pasta=PASTA_CACHE, tamanho_max=TAMANHO_MAX_CACHE):
+        self.pasta = pasta
+        self.tamanho_max = tamanho_max
+        self.caminho_indice = os.path.join(pasta, "indice.db")
+        os.makedirs(pasta, exist_ok=True)
+        # isolation_level=None: as transações são abertas à mão (BEGIN IMMEDIATE)
+        self.ligacao = sqlite3.connect(self.caminho_indice, timeout=30, isolation_level=None)
+        self.ligacao.execute("PRAGMA journal_mode = WAL")
+        self.ligacao.executescript(ESQUEMA)
+        self._importa_indice_json()
+
+    # caches criadas antes do índice em SQLite
+    def _importa_indice_json(self):
+        antigo = os.path.join(self.pasta, "indice.json")
+        try:
+            with open(antigo, "r", encoding="utf-8") as f:
+                indice = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.ligacao.executemany(
+            "INSERT OR IGNORE INTO entradas VALUES (?, ?, ?, ?)",
+            [(chave, m["tamanho"], m["criado"], m["ultimo_acesso"]) for chave, m in indice.items()],
+        )
+        os.remove(antigo)
+
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, chave + ".pkl")
+
+    def __contains__(self, chave):
+        return self.ligacao.execute("SELECT 1 FROM entradas WHERE chave = ?", (chave,)).fetchone() is not None
+
+    def __len__(self):
+        return self.ligacao.execute("SELECT COUNT(*) FROM entradas").fetchone()[0]
+
+    def tamanho_total(self):
+        return self.ligacao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM entradas").fetchone()[0]
+
+    def obter(self, chave):
+        if chave not in self:
+            return None
+        try:
+            with open(self._caminho(chave), "rb") as f:
+                resultados = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            # ficheiro apagado ou corrompido: esquece a entrada
+            self.ligacao.execute("DELETE FROM entradas WHERE chave = ?", (chave,))
+            return None
+
+        self.ligacao.execute("UPDATE entradas SET ultimo_acesso = ? WHERE chave = ?", (time.time(), chave))
+        return resultados
+
+    def guardar(self, chave, resultados):
+        caminho = self._caminho(chave)
+        temporario = caminho + ".tmp"
+        with open(temporario, "wb") as f:
+            pickle.dump(resultados, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, caminho)
+
+        agora = time.time()
+        # inserção e remoção LRU numa só transação de escrita: outro processo
+        # espera por ela em vez de remover ao mesmo tempo
+        self.ligacao.execute("BEGIN IMMEDIATE")
+        try:
+            self.ligacao.execute(
+                "INSERT OR REPLACE INTO entradas VALUES (?, ?, ?, ?)",
+                (chave, os.path.getsize(caminho), agora, agora),
+            )
+            removidas = self._remove_excedente()
+            self.ligacao.execute("COMMIT")
+        except BaseException:
+            self.ligacao.execute("ROLLBACK")
+            raise
+        self._apaga_ficheiros(removidas)
+
+    # retira do índice as entradas usadas há mais tempo até caber no tamanho máximo
+    def _remove_excedente(self):
+        total = self.tamanho_total()
+        removidas = []
+        if total <= self.tamanho_max:
+            return removidas
+
+        for chave, tamanho in self.ligacao.execute("SELECT chave, tamanho FROM entradas ORDER BY ultimo_acesso").fetchall():
+            if total <= self.tamanho_max:
+                break
+            total -= tamanho
+            removidas.append(chave)
+        self.ligacao.executemany("DELETE FROM entradas WHERE chave = ?", [(chave,) for chave in removidas])
+        return removidas
+
+    def _apaga_ficheiros(self, chaves):
+        for chave in chaves:
+            try:
+                os.remove(self._caminho(chave))
+            except OSError:
+                pass
+
+    def limpa(self):
+        self.ligacao.execute("BEGIN IMMEDIATE")
+        chaves = [linha[0] for linha in self.ligacao.execute("SELECT chave FROM entradas")]
+        self.ligacao.execute("DELETE FROM entradas")
+        self.ligacao.execute("COMMIT")
+        self._apaga_ficheiros(chaves)
+
+
+_cache = None
+
+def cache_padrao():
+    global _cache
+    if _cache is None:
+        _cache = CacheResultados()
+    return _cache
+
+
+# --- Execuções que passam pela cache
+
+def _executa(pedido):
+    config, semente = pedido
+    return simula(config, semente=semente, verboso=False)
+
+def simula_cache(config=None, semente=0, cache=None):
+    if semente is None:
+        return simula(config, verboso=False)
+
+    if cache is None:
+        cache = cache_padrao()
+
+    chave = chave_cache(config, semente)
+    resultados = cache.obter(chave)
+    if resultados is None:
+        resultados = _executa((config, semente))
+        cache.guardar(chave, resultados)
+    return resultados
+
+# pedidos: lista de (config, semente). Só as células em falta são calculadas,
+# cada (config, semente) repetida uma só vez, em paralelo se trabalhadores > 1;
+# a escrita na cache é feita sempre neste processo (os processos filhos não
+# abrem o índice). usar_cache=False calcula tudo sem ler nem escrever na cache.
+def simula_varios(pedidos, trabalhadores=1, cache=None, usar_cache=True):
+    if cache is None and usar_cache:
+        cache = cache_padrao()
+
+    # a configuração completa segue para os processos filhos, que não veem
+    # alterações feitas aos parâmetros globais deste processo
+    pedidos = [(prepara_config(config), semente) for config, semente in pedidos]
+
+    # sem semente cada pedido é uma execução diferente e não tem chave
+    chaves = [chave_cache(config, semente) if semente is not None else None for config, semente in pedidos]
+    resultados = [None] * len(pedidos)
+    em_falta = []
+    repetidos = {}      # índice do primeiro pedido com a chave -> outros com a mesma
+    primeiro = {}
+
+    for i, chave in enumerate(chaves):
+        if chave is not None and chave in primeiro:
+            repetidos[primeiro[chave]].append(i)
+            continue
+        if chave is not None:
+            primeiro[chave] = i
+            repetidos[i] = []
+        if usar_cache and chave is not None:
+            resultados[i] = cache.obter(chave)
+        if resultados[i] is None:
+            em_falta.append(i)
+
+    if trabalhadores > 1 and len(em_falta) > 1:
+        with ProcessPoolExecutor(max_workers=trabalhadores) as ex:
+            calculados = list(ex.map(_executa, [pedidos[i] for i in em_falta]))
+    else:
+        calculados = [_executa(pedidos[i]) for i in em_falta]
+
+    for i, res in zip(em_falta, calculados):
+        resultados[i] = res
+        if usar_cache and chaves[i] is not None:
+            cache.guardar(chaves[i], res)
+
+    # os repetidos recebem cópias, para que alterar um resultado não altere os outros
+    for i, outros in repetidos.items():
+        for j in outros:
+            resultados[j] = copy.deepcopy(resultados[i])
+
+    return resultados
@@ -0,0 +1,349 @@
+# Chegadas a partir de registos reais de triagem
+#
+# Em vez das chegadas de Poisson sintéticas, a simulação pode seguir um registo
+# de chegadas (tempo, especialidade, prioridade e, opcionalmente, duração da
+# consulta) lido do disco aos blocos. Dois formatos com a mesma interface
+# (especialidades, prioridades, fim, blocos(tamanho)):
+#   - CSV com cabeçalho tempo,especialidade,prioridade[,servico]; o tempo é em
+#     minutos ou uma data/hora ISO (minutos desde a primeira linha);
+#   - binário: ASSINATURA, registos de tamanho fixo (REGISTO) e um rodapé JSON
+#     com as especialidades, as prioridades, o número de registos e o último
+#     tempo, seguido do tamanho do rodapé (8 bytes), como no traço de eventos.
+#     converte() passa um CSV para binário, que é muito mais rápido de reler.
+#
+# O motor recebe um bloco de cada vez: antes de agendar um bloco trata todos os
+# eventos anteriores à sua primeira chegada, por isso a lista de eventos nunca
+# tem mais do que um bloco de chegadas. Com compacto=True (por omissão) os
+# doentes que já saíram são somados num Resumo e esquecidos entre blocos e os
+# históricos são descartados: a memória não cresce com o comprimento do registo
+# e o resultado tem só as métricas de resumo. Com compacto=False o resultado é
+# o mesmo dicionário de simula(), com todos os históricos.
+#
+# As consultas sem duração no registo são sorteadas como em simula().
+# reproduz_varios() simula o mesmo registo com várias configurações (ex.:
+# número de médicos) em paralelo; cada processo lê o ficheiro por si.
+#
+#   python -m zenith.chegadas registo.csv --converte registo.zch
+#   python -m zenith.chegadas registo.zch --medicos 3 4 5 6 --trabalhadores 4
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from zenith.simulacao import (
+    CHEGADA, ESPECIALIDADES, PRIORIDADES, Doente, avanca, cria_medicos, estado_vazio,
+    geradores, prepara_config, resultados_estado,
+)
+
+ASSINATURA = b"ZCHEGADAS1\n"
+
+REGISTO = np.dtype([
+    ("tempo", "<f8"),
+    ("especialidade", "u1"),
+    ("prioridade", "u1"),
+    ("servico", "<f8"),     # NaN -> duração sorteada
+])
+
+BLOCO = 65536
+
+
+# --- Leitura dos registos
+
+class RegistoCSV:
+    def __init__(self, caminho, especialidades=None, prioridades=None):
+        self.caminho = caminho
+        self.especialidades = list(especialidades if especialidades is not None else ESPECIALIDADES)
+        self.prioridades = list(prioridades if prioridades is not None else PRIORIDADES)
+        self.indice_especialidade = {esp: i for i, esp in enumerate(self.especialidades)}
+        self.indice_prioridade = {cor: i for i, cor in enumerate(self.prioridades)}
+
+        with open(caminho, "r", encoding="utf-8", newline="") as f:
+            leitor = csv.reader(f)
+            self.colunas = [c.strip().lower() for c in next(leitor, [])]
+            primeira = next(leitor, None)
+        for coluna in ("tempo", "especialidade", "prioridade"):
+            if coluna not in self.colunas:
+                raise ValueError(f"{caminho}: falta a coluna {coluna}")
+
+        # datas/horas ISO contam em minutos desde a primeira linha
+        self.origem = None
+        if primeira:
+            try:
+                float(primeira[self.colunas.index("tempo")])
+            except ValueError:
+                self.origem = datetime.fromisoformat(primeira[self.colunas.index("tempo")].strip())
+        self.fim = self._tempo(self._ultima_linha()[self.colunas.index("tempo")]) if primeira else 0.0
+
+    def _tempo(self, texto):
+        if self.origem is None:
+            return float(texto)
+        return (datetime.fromisoformat(texto.strip()) - self.origem).total_seconds() / 60
+
+    # lê só o fim do ficheiro, sem o percorrer
+    def _ultima_linha(self):
+        with open(self.caminho, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            tamanho = f.tell()
+            lido = 4096
+            while True:
+                f.seek(max(0, tamanho - lido))
+                linhas = f.read().splitlines()
+                if len(linhas) > 1 or lido >= tamanho:
+                    break
+                lido *= 2
+        ultima = next(linha for linha in reversed(linhas) if linha.strip())
+        return next(csv.reader([ultima.decode("utf-8")]))
+
+    def blocos(self, tamanho=BLOCO):
+        i_tempo = self.colunas.index("tempo")
+        i_esp = self.colunas.index("especialidade")
+        i_cor = self.colunas.index("prioridade")
+        i_servico = self.colunas.index("servico") if "servico" in self.colunas else None
+
+        with open(self.caminho, "r", encoding="utf-8", newline="") as f:
+            leitor = csv.reader(f)
+            next(leitor)
+            anterior = -math.inf
+            while True:
+                linhas = list(itertools.islice(leitor, tamanho))
+                if not linhas:
+                    return
+                bloco = np.empty(len(linhas), dtype=REGISTO)
+                for k, linha in enumerate(linhas):
+                    if not linha:
+                        continue
+                    try:
+                        tempo = self._tempo(linha[i_tempo])
+                        esp = self.indice_especialidade[linha[i_esp].strip().lower()]
+                        cor = self.indice_prioridade[linha[i_cor].strip().lower()]
+                        servico = float(linha[i_servico]) if i_servico is not None and linha[i_servico].strip() else math.nan
+                    except KeyError as erro:
+                        raise ValueError(f"{self.caminho}, linha {leitor.line_num - len(linhas) + k + 1}: especialidade ou prioridade desconhecida {erro}") from None
+                    except (ValueError, IndexError) as erro:
+                        raise ValueError(f"{self.caminho}, linha {leitor.line_num - len(linhas) + k + 1}: {erro}") from None
+                    if tempo < anterior:
+                        raise ValueError(f"{self.caminho}: as chegadas não estão por ordem de tempo")
+                    anterior = tempo
+                    bloco[k] = (tempo, esp, cor, servico)
+                # linhas vazias ficam de fora
+                yield bloco[[bool(linha) for linha in linhas]]
+
+class RegistoBinario:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, "rb") as f:
+            if f.read(len(ASSINATURA)) != ASSINATURA:
+                raise ValueError(f"{caminho}: não é um registo de chegadas")
+            f.seek(-8, os.SEEK_END)
+            (tamanho_rodape,) = struct.unpack("<Q", f.read(8))
+            f.seek(-8 - tamanho_rodape, os.SEEK_END)
+            rodape = json.loads(f.read(tamanho_rodape).decode("utf-8"))
+
+        self.especialidades = rodape["especialidades"]
+        self.prioridades = rodape["prioridades"]
+        self.n = rodape["n"]
+        self.fim = rodape["fim"]
+
+    def blocos(self, tamanho=BLOCO):
+        with open(self.caminho, "rb") as f:
+            f.seek(len(ASSINATURA))
+            restantes = self.n
+            while restantes:
+                bloco = np.fromfile(f, dtype=REGISTO, count=min(tamanho, restantes))
+                restantes -= len(bloco)
+                yield bloco
+
+def abre_registo(caminho):
+    with open(caminho, "rb") as f:
+        binario = f.read(len(ASSINATURA)) == ASSINATURA
+    return RegistoBinario(caminho) if binario else RegistoCSV(caminho)
+
+def converte(origem, destino, tamanho=BLOCO):
+    registo = abre_registo(origem)
+    n = 0
+    fim = 0.0
+    with open(destino, "wb") as f:
+        f.write(ASSINATURA)
+        for bloco in registo.blocos(tamanho):
+            bloco.tofile(f)
+            n += len(bloco)
+            if len(bloco):
+                fim = float(bloco["tempo"][-1])
+        rodape = json.dumps({
+            "especialidades": registo.especialidades,
+            "prioridades": registo.prioridades,
+            "n": n,
+            "fim": fim,
+        }, ensure_ascii=False).encode("utf-8")
+        f.write(rodape)
+        f.write(struct.pack("<Q", len(rodape)))
+    return n
+
+
+# --- Resumo dos doentes que já saíram (modo compacto)
+
+class Resumo:
+    def __init__(self):
+        self.area_fila = 0.0
+        self.fila_max = 0
+        self.soma_espera = 0.0
+        self.n_espera = 0
+        self.soma_sistema = 0.0
+        self.n_sistema = 0
+        self.espera_prioridade = {}    # cor -> [soma, n]
+
+    def compacta(self, estado):
+        # área da fila até ao último registo, que fica como início do troço seguinte
+        historico_fila = estado["historico_fila"]
+        if historico_fila:
+            historico = np.asarray(historico_fila, dtype=float)
+            self.area_fila += float(np.dot(historico[:-1, 1], np.diff(historico[:, 0])))
+            self.fila_max = max(self.fila_max, int(historico[:, 1].max()))
+            del historico_fila[:-1]
+
+        for cor, esperas in estado["tempos_espera_prioridade"].items():
+            acumulado = self.espera_prioridade.setdefault(cor, [0.0, 0])
+            acumulado[0] += sum(esperas)
+            acumulado[1] += len(esperas)
+            esperas.clear()
+
+        estado_doentes = estado["estado_doentes"]
+        feitos = [did for did, d in estado_doentes.items() if d["estado"] in ("Atendido", "Desistiu")]
+        for did in feitos:
+            del estado_doentes[did]
+            del estado["chegadas"][did]
+            del estado["tempos_chegada"][did]
+            estado["tempos_inicio_consulta"].pop(did, None)
+            estado["servicos"].pop(did, None)
+            espera = estado["tempos_espera"].pop(did, None)
+            if espera is not None:
+                self.soma_espera += espera
+                self.n_espera += 1
+            sistema = estado["tempos_sistema"].pop(did, None)
+            if sistema is not None:
+                self.soma_sistema += sistema
+                self.n_sistema += 1
+
+        for chave in ("historico_fila_detalhado", "historico_doentes_fila", "historico_ocupacao", "historico_desistencias"):
+            estado[chave].clear()
+
+    def resultados(self, estado, num_doentes):
+        cfg = estado["cfg"]
+        tempo_simulacao = cfg["TEMPO_SIMULACAO"]
+        medicos = estado["medicos"]
+        return {
+            "fila_media": self.area_fila / tempo_simulacao,
+            "fila_max": self.fila_max,
+            "media_espera": self.soma_espera / self.n_espera if self.n_espera else 0,
+            "media_sistema": self.soma_sistema / self.n_sistema if self.n_sistema else 0,
+            "doentes_atendidos": estado["doentes_atendidos"],
+            "desistencias": estado["desistencias"],
+            "num_eventos": estado["num_eventos"],
+            "semente": estado["semente"],
+            "taxa_chegada_realizada": num_doentes / tempo_simulacao,
+            "media_tempo_consulta_realizada": estado["soma_consultas"] / estado["num_consultas"] if estado["num_consultas"] else 0,
+            "media_espera_prioridade": {cor: soma / n if n else 0 for cor, (soma, n) in self.espera_prioridade.items()},
+            "config": cfg,
+            "medicos": medicos,
+            "ocupacao": estado["ocupacao"].resumo(medicos),
+        }
+
+
+# --- Simulação a partir de um registo
+
+def _agenda_bloco(estado, bloco, especialidades, prioridades, n):
+    chegadas = estado["chegadas"]
+    tempos_chegada = estado["tempos_chegada"]
+    servicos = estado["servicos"]
+    eventos = estado["eventos"]
+    for tempo, esp, cor, servico in bloco.tolist():
+        did = f"r{n}"
+        chegadas[did] = Doente(did, did, especialidades[esp], prioridades[cor])
+        tempos_chegada[did] = tempo
+        if servico == servico:     # não é NaN
+            servicos[did] = servico
+        eventos.agenda(tempo, CHEGADA, did)
+        n += 1
+    return n
+
+# tempo_simulacao: por omissão, até ao fim do registo
+def reproduz(caminho, config=None, semente=None, compacto=True, tempo_simulacao=None, tamanho_bloco=BLOCO):
+    registo = abre_registo(caminho)
+    cfg = prepara_config(config)
+    cfg["TEMPO_SIMULACAO"] = tempo_simulacao if tempo_simulacao is not None else math.floor(registo.fim) + 1
+    if cfg["COMPETENCIAS_MEDICOS"]:
+        cfg["NUM_MEDICOS"] = len(cfg["COMPETENCIAS_MEDICOS"])
+    for esp in registo.especialidades:
+        if esp not in cfg["ESPECIALIDADES"]:
+            raise ValueError(f"especialidade do registo que não está na configuração: {esp}")
+
+    aleatorio, _, rng_consultas, rng_paciencia = geradores(semente)
+    estado = estado_vazio(cfg, semente, cria_medicos(cfg, aleatorio), aleatorio, None, rng_consultas, rng_paciencia)
+    resumo = Resumo() if compacto else None
+
+    n = 0
+    for bloco in registo.blocos(tamanho_bloco):
+        bloco = bloco[bloco["tempo"] < cfg["TEMPO_SIMULACAO"]]
+        if not len(bloco):
+            break
+        avanca(estado, ate=bloco["tempo"][0])
+        if resumo:
+            resumo.compacta(estado)
+        n = _agenda_bloco(estado, bloco, registo.especialidades, registo.prioridades, n)
+
+    avanca(estado)
+    if resumo:
+        resumo.compacta(estado)
+        return resumo.resultados(estado, n)
+    return resultados_estado(estado)
+
+def _executa(pedido):
+    caminho, config, semente, compacto, tempo_simulacao = pedido
+    return reproduz(caminho, config, semente, compacto, tempo_simulacao)
+
+# o mesmo registo com várias configurações, em paralelo se trabalhadores > 1
+def reproduz_varios(caminho, configs, semente=0, trabalhadores=1, compacto=True, tempo_simulacao=None):
+    # a configuração completa segue para os processos filhos (ver cache.simula_varios)
+    pedidos = [(caminho, prepara_config(config), semente, compacto, tempo_simulacao) for config in configs]
+    if trabalhadores > 1 and len(pedidos) > 1:
+        with ProcessPoolExecutor(max_workers=trabalhadores) as ex:
+            return list(ex.map(_executa, pedidos))
+    return [_executa(pedido) for pedido in pedidos]
+
+
+def main(argumentos=None):
+    from zenith import historico
+
+    parser = argparse.ArgumentParser(description="Simulação a partir de um registo de chegadas (CSV ou binário)")
+    parser.add_argument("registo")
+    parser.add_argument("--converte", metavar="DESTINO", help="converte o registo para o formato binário e termina")
+    parser.add_argument("--medicos", type=int, nargs="+", help="um ou mais números de médicos")
+    parser.add_argument("--horas", type=float, help="horizonte (horas); por omissão, até ao fim do registo")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--trabalhadores", type=int, default=1)
+    args = parser.parse_args(argumentos)
+
+    if args.converte:
+        n = converte(args.registo, args.converte)
+        print(f"{n} chegadas gravadas em {args.converte}")
+        return
+
+    configs = [{"NUM_MEDICOS": m} for m in args.medicos] if args.medicos else [{}]
+    tempo_simulacao = args.horas * 60 if args.horas is not None else None
+    execucoes = reproduz_varios(args.registo, configs, args.semente, args.trabalhadores, tempo_simulacao=tempo_simulacao)
+
+    print(f"{'médicos':10s}" + "".join(f"{m:>18s}" for m in historico.METRICAS))
+    for resultados in execucoes:
+        print(f"{resultados['config']['NUM_MEDICOS']:<10d}" + "".join(f"{resultados[m]:18.2f}" for m in historico.METRICAS))
+
+
+if __name__ == "__main__":
+    main()
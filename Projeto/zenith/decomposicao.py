@@ -0,0 +1,226 @@
+# Simulação decomposta por especialidade
+#
+# Quando cada médico tem uma só especialidade, um médico só atende doentes da
+# sua especialidade e a desistência só depende do doente. Cardiologia,
+# ortopedia e neurologia são então subsistemas independentes que apenas
+# partilham o ciclo de eventos e a fila. Aqui:
+#   1. o fluxo de chegadas (tempos, especialidades, cores) e os médicos são
+#      gerados uma vez, como em simula();
+#   2. cada especialidade é simulada à parte, com os seus médicos e as suas
+#      chegadas, em paralelo se trabalhadores > 1;
+#   3. as partes são juntas: contadores somados, históricos intercalados por
+#      tempo (o tamanho da fila e os médicos ocupados são as somas das partes).
+#
+# Durações das consultas e paciências aleatórias vêm de um fluxo próprio de
+# cada especialidade (derivado da semente), por isso os resultados coincidem
+# com simula() em distribuição, não semente a semente. Para a mesma semente
+# não dependem do número de trabalhadores.
+#
+# refaz_especialidade() volta a simular só uma especialidade com outro número
+# de médicos, com as mesmas chegadas e os mesmos números aleatórios, e junta-a
+# às restantes partes sem as repetir.
+#
+#   python -m zenith.decomposicao --taxa 40 --medicos 9 --trabalhadores 3
+
+import argparse
+import heapq
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from zenith.simulacao import (
+    CHEGADA, Medico, Ocupacao, avanca, bits_especialidades, estado_inicial,
+    estado_vazio, prepara_config, resultados_estado, simula,
+)
+
+
+def decomponivel(config=None):
+    cfg = prepara_config(config)
+    return not cfg["COMPETENCIAS_MEDICOS"] or all(len(c) == 1 for c in cfg["COMPETENCIAS_MEDICOS"])
+
+
+# --- Divisão em partes
+
+# geradores da parte i: chaves de derivação distintas das três de simula()
+def _geradores(semente, indice):
+    fluxo = np.random.SeedSequence(semente, spawn_key=(3 + indice,))
+    fluxo_consultas, fluxo_paciencia = fluxo.spawn(2)
+    return (
+        np.random.RandomState(np.random.MT19937(fluxo_consultas)),
+        np.random.RandomState(np.random.MT19937(fluxo_paciencia)),
+    )
+
+# estado por simular de uma especialidade, com as chegadas dadas (did -> tempo)
+def parte(cfg, semente, esp, medicos, chegadas, tempos_chegada):
+    rng_consultas, rng_paciencia = _geradores(semente, cfg["ESPECIALIDADES"].index(esp))
+    estado = estado_vazio(cfg, semente, medicos, None, None, rng_consultas, rng_paciencia)
+    for did, tempo in sorted(tempos_chegada.items(), key=lambda item: item[1]):
+        estado["chegadas"][did] = chegadas[did]
+        estado["tempos_chegada"][did] = tempo
+        estado["eventos"].agenda(tempo, CHEGADA, did)
+    return estado
+
+def divide(config=None, semente=None):
+    cfg = prepara_config(config)
+    if not decomponivel(cfg):
+        raise ValueError("só há decomposição por especialidade com médicos de uma só especialidade")
+
+    completo = estado_inicial(cfg, semente)
+    cfg = completo["cfg"]
+    partes = {}
+    for esp in cfg["ESPECIALIDADES"]:
+        chegadas = {did: d for did, d in completo["chegadas"].items() if d.especialidade == esp}
+        tempos = {did: completo["tempos_chegada"][did] for did in chegadas}
+        medicos = [m for m in completo["medicos"] if m.especialidade == esp]
+        partes[esp] = parte(cfg, semente, esp, medicos, chegadas, tempos)
+    return partes
+
+def _corre_parte(estado):
+    return avanca(estado)
+
+# partes: esp -> estado por simular; devolve esp -> estado simulado
+def corre(partes, trabalhadores=1):
+    nomes = list(partes)
+    if trabalhadores > 1 and len(nomes) > 1:
+        with ProcessPoolExecutor(max_workers=trabalhadores) as ex:
+            return dict(zip(nomes, ex.map(_corre_parte, [partes[n] for n in nomes])))
+    return {nome: _corre_parte(partes[nome]) for nome in nomes}
+
+
+# --- Junção das partes
+
+# historicos: listas de (tempo, valor) de cada parte; devolve (tempo, soma dos
+# valores atuais de todas as partes) por ordem de tempo
+def _soma_degraus(historicos):
+    atuais = [0] * len(historicos)
+    total = 0
+    juntos = []
+    etiquetados = [[(t, i, v) for t, v in h] for i, h in enumerate(historicos)]
+    for t, i, v in heapq.merge(*etiquetados, key=lambda e: e[0]):
+        total += v - atuais[i]
+        atuais[i] = v
+        juntos.append((t, total))
+    return juntos
+
+def _junta_filas_detalhadas(historicos, tempos_chegada):
+    atuais = [[] for _ in historicos]
+    juntos = []
+    etiquetados = [[(t, i, ids) for t, ids in h] for i, h in enumerate(historicos)]
+    for t, i, ids in heapq.merge(*etiquetados, key=lambda e: e[0]):
+        atuais[i] = ids
+        # a fila completa está por ordem de entrada, que é a ordem de chegada
+        juntos.append((t, sorted((did for ids in atuais for did in ids), key=tempos_chegada.get)))
+    return juntos
+
+def junta(partes):
+    estados = list(partes.values())
+    cfg = estados[0]["cfg"]
+
+    medicos = sorted((m for e in estados for m in e["medicos"]), key=lambda m: int(m.id[1:]))
+    ocupacao = Ocupacao(medicos, cfg["TEMPO_SIMULACAO"])
+    for e in estados:
+        ocupacao.junta(e["ocupacao"])
+
+    tempos_chegada = {}
+    chegadas_partes = {}
+    for e in estados:
+        tempos_chegada.update(e["tempos_chegada"])
+        chegadas_partes.update(e["chegadas"])
+    # doentes pela ordem global de chegada, como em simula()
+    ordem_doentes = sorted(tempos_chegada, key=tempos_chegada.get)
+    chegadas = {did: chegadas_partes[did] for did in ordem_doentes}
+
+    estado_doentes = {}
+    for e in estados:
+        estado_doentes.update(e["estado_doentes"])
+    estado_doentes = {did: estado_doentes[did] for did in ordem_doentes if did in estado_doentes}
+
+    desistencias = sorted(t for e in estados for t, _ in e["historico_desistencias"])
+
+    estado = {
+        "cfg": cfg,
+        "semente": estados[0]["semente"],
+        "medicos": medicos,
+        "ocupacao": ocupacao,
+        "chegadas": chegadas,
+        "tempos_chegada": tempos_chegada,
+        "estado_doentes": estado_doentes,
+        "historico_fila": _soma_degraus([e["historico_fila"] for e in estados]),
+        "historico_ocupacao": _soma_degraus([e["historico_ocupacao"] for e in estados]),
+        "historico_fila_detalhado": _junta_filas_detalhadas([e["historico_fila_detalhado"] for e in estados], tempos_chegada),
+        "historico_doentes_fila": list(heapq.merge(*[e["historico_doentes_fila"] for e in estados], key=lambda h: h[0])),
+        "historico_desistencias": [(t, n) for n, t in enumerate(desistencias, 1)],
+        "tempos_espera_prioridade": {
+            cor: [w for e in estados for w in e["tempos_espera_prioridade"][cor]]
+            for cor in estados[0]["tempos_espera_prioridade"]
+        },
+    }
+    for chave in ("tempos_espera", "tempos_sistema"):
+        estado[chave] = {did: t for e in estados for did, t in e[chave].items()}
+    for chave in ("doentes_atendidos", "desistencias", "soma_consultas", "num_consultas", "num_eventos"):
+        estado[chave] = sum(e[chave] for e in estados)
+
+    resultados = resultados_estado(estado)
+    resultados["partes"] = partes
+    return resultados
+
+
+# --- Execuções
+
+# com médicos de várias especialidades cai em simula() (sem "partes" nos resultados)
+def simula_decomposta(config=None, semente=None, trabalhadores=1):
+    if not decomponivel(config):
+        return simula(config, semente=semente, verboso=False)
+    return junta(corre(divide(config, semente), trabalhadores))
+
+# partes: as de uma execução decomposta anterior (resultados["partes"]); a
+# especialidade esp volta a ser simulada com num_medicos médicos (os que já
+# tinha primeiro, os novos com ids a seguir ao último) e as outras ficam iguais
+def refaz_especialidade(partes, esp, num_medicos):
+    anterior = partes[esp]
+    cfg = anterior["cfg"]
+    bits = bits_especialidades(cfg["ESPECIALIDADES"])
+
+    medicos = [Medico(m.id, esp, mascara=bits[esp]) for m in anterior["medicos"][:num_medicos]]
+    proximo = 1 + max((int(m.id[1:]) for e in partes.values() for m in e["medicos"]), default=-1)
+    while len(medicos) < num_medicos:
+        medicos.append(Medico(f"m{proximo}", esp, mascara=bits[esp]))
+        proximo += 1
+
+    nova = parte(cfg, anterior["semente"], esp, medicos, anterior["chegadas"], anterior["tempos_chegada"])
+    novas = dict(partes)
+    novas[esp] = avanca(nova)
+    return junta(novas)
+
+
+def main(argumentos=None):
+    from zenith import historico
+
+    parser = argparse.ArgumentParser(description="Simulação decomposta por especialidade")
+    parser.add_argument("--medicos", type=int)
+    parser.add_argument("--taxa", type=float, help="taxa de chegada (doentes/hora)")
+    parser.add_argument("--horas", type=float, help="horizonte da simulação (horas)")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--trabalhadores", type=int, default=1)
+    args = parser.parse_args(argumentos)
+
+    config = {}
+    if args.medicos is not None:
+        config["NUM_MEDICOS"] = args.medicos
+    if args.taxa is not None:
+        config["TAXA_CHEGADA"] = args.taxa / 60
+    if args.horas is not None:
+        config["TEMPO_SIMULACAO"] = args.horas * 60
+
+    inicio = time.perf_counter()
+    resultados = simula_decomposta(config, args.semente, args.trabalhadores)
+    duracao = time.perf_counter() - inicio
+
+    for metrica in historico.METRICAS:
+        print(f"{metrica:20s} {resultados[metrica]:10.2f}")
+    print(f"\n{len(resultados.get('partes', {})) or 1} partes em {duracao:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
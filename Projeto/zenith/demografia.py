@@ -0,0 +1,154 @@
+# Triagem condicionada à idade e ao sexo do doente
+#
+# Cada doente cai num grupo demográfico (faixa etária × sexo). Em cada grupo a
+# probabilidade de cada especialidade e de cada cor é a base (especialidades
+# equiprováveis, cores com PESOS_PRIORIDADE) multiplicada por um fator do grupo
+# e renormalizada. A especialidade e a cor são independentes dentro do grupo,
+# por isso cada grupo tem uma só distribuição conjunta (especialidade, cor).
+#
+# As distribuições são convertidas uma vez em tabelas de alias (método de
+# Walker, construção de Vose): sortear um par custa O(1) — uma uniforme, uma
+# posição e uma comparação — seja qual for o número de especialidades e cores,
+# e sorteia-se um vetor inteiro de doentes com duas indexações NumPy.
+#
+# Os fatores abaixo são ilustrativos (mais cardiologia e mais vermelhos com a
+# idade, mais ortopedia nos jovens); especialidades ou cores sem fator ficam
+# com fator 1.
+
+from bisect import bisect_right
+from functools import lru_cache
+
+import numpy as np
+
+LIMITES_IDADE = [40, 65, 80]
+FAIXAS_ETARIAS = ["18-39", "40-64", "65-79", "80+"]
+SEXOS = ["masculino", "feminino", "outro"]
+
+# fator por faixa etária
+FATOR_ESPECIALIDADE = {
+    "cardiologia": [0.5, 1.0, 1.8, 2.2],
+    "ortopedia": [1.4, 1.0, 1.1, 1.3],
+    "neurologia": [0.8, 1.0, 1.3, 1.7],
+}
+FATOR_SEXO_ESPECIALIDADE = {
+    "masculino": {"cardiologia": 1.2},
+    "feminino": {"ortopedia": 1.1, "neurologia": 1.1},
+}
+FATOR_PRIORIDADE = {
+    "vermelho": [0.6, 1.0, 1.5, 2.0],
+    "amarelo": [0.9, 1.0, 1.1, 1.2],
+    "verde": [1.2, 1.0, 0.8, 0.6],
+}
+
+
+# --- Grupos demográficos
+
+def faixa_etaria(idade):
+    return bisect_right(LIMITES_IDADE, idade)
+
+# índice do grupo: faixa × len(SEXOS) + sexo (sexo desconhecido -> "outro")
+def grupo(pessoa):
+    sexo = pessoa.get("sexo")
+    s = SEXOS.index(sexo) if sexo in SEXOS else len(SEXOS) - 1
+    return faixa_etaria(pessoa.get("idade", 0)) * len(SEXOS) + s
+
+def nome_grupo(g):
+    return f"{FAIXAS_ETARIAS[g // len(SEXOS)]}/{SEXOS[g % len(SEXOS)]}"
+
+NUM_GRUPOS = len(FAIXAS_ETARIAS) * len(SEXOS)
+
+
+# --- Tabelas de alias
+
+def tabela_alias(pesos):
+    pesos = np.asarray(pesos, dtype=float)
+    n = len(pesos)
+    total = pesos.sum()
+    if n == 0 or total <= 0:
+        raise ValueError("a distribuição precisa de pelo menos um peso positivo")
+
+    escala = pesos * n / total
+    prob = np.ones(n)
+    alias = np.arange(n)
+    pequenos = [i for i in range(n) if escala[i] < 1]
+    grandes = [i for i in range(n) if escala[i] >= 1]
+
+    while pequenos and grandes:
+        p = pequenos.pop()
+        g = grandes.pop()
+        prob[p] = escala[p]
+        alias[p] = g
+        escala[g] -= 1 - escala[p]
+        (pequenos if escala[g] < 1 else grandes).append(g)
+
+    # o que sobra tem probabilidade 1 (a menos de erros de arredondamento)
+    return prob, alias
+
+def sorteia(prob, alias, u):
+    x = u * len(prob)
+    i = int(x)
+    return i if x - i < prob[i] else alias[i]
+
+# prob e alias com uma linha por grupo; grupos e u são vetores
+def sorteia_varios(prob, alias, grupos, u):
+    x = u * prob.shape[1]
+    i = x.astype(int)
+    return np.where(x - i < prob[grupos, i], i, alias[grupos, i])
+
+
+# --- Distribuições condicionadas
+
+def distribuicao_grupo(g, especialidades, pesos_prioridade):
+    faixa = g // len(SEXOS)
+    sexo = SEXOS[g % len(SEXOS)]
+    fatores_sexo = FATOR_SEXO_ESPECIALIDADE.get(sexo, {})
+
+    p_esp = np.array([
+        FATOR_ESPECIALIDADE.get(esp, [1.0] * len(FAIXAS_ETARIAS))[faixa] * fatores_sexo.get(esp, 1.0)
+        for esp in especialidades
+    ])
+    p_cor = np.array([
+        peso * FATOR_PRIORIDADE.get(cor, [1.0] * len(FAIXAS_ETARIAS))[faixa]
+        for cor, peso in pesos_prioridade
+    ])
+    return p_esp / p_esp.sum(), p_cor / p_cor.sum()
+
+# uma tabela de alias por grupo sobre os pares (especialidade, cor);
+# o par k corresponde a especialidades[k // num_cores], cores[k % num_cores]
+@lru_cache(maxsize=None)
+def _tabelas(especialidades, pesos_prioridade):
+    prob = np.empty((NUM_GRUPOS, len(especialidades) * len(pesos_prioridade)))
+    alias = np.empty(prob.shape, dtype=int)
+    for g in range(NUM_GRUPOS):
+        p_esp, p_cor = distribuicao_grupo(g, especialidades, pesos_prioridade)
+        prob[g], alias[g] = tabela_alias(np.outer(p_esp, p_cor).ravel())
+    prob.flags.writeable = False
+    alias.flags.writeable = False
+    return prob, alias
+
+def tabelas_triagem(especialidades, pesos_prioridade):
+    return _tabelas(tuple(especialidades), tuple(pesos_prioridade.items()))
+
+
+# --- Sorteio de um doente (simula) e de muitos (motor vetorial)
+
+class Triagem:
+    def __init__(self, especialidades, pesos_prioridade):
+        self.especialidades = list(especialidades)
+        self.cores = list(pesos_prioridade)
+        self.prob, self.alias = tabelas_triagem(especialidades, pesos_prioridade)
+
+    # u: uniforme em [0, 1); devolve (especialidade, cor)
+    def sorteia(self, pessoa, u):
+        g = grupo(pessoa)
+        k = sorteia(self.prob[g], self.alias[g], u)
+        num_cores = len(self.cores)
+        return self.especialidades[k // num_cores], self.cores[k % num_cores]
+
+    # índices (especialidade, cor) de um vetor de grupos
+    def sorteia_varios(self, grupos, u):
+        k = sorteia_varios(self.prob, self.alias, grupos, u)
+        return np.divmod(k, len(self.cores))
+
+def grupos_pessoas(pessoas):
+    return np.array([grupo(p) for p in pessoas], dtype=int)
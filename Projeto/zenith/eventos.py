@@ -0,0 +1,137 @@
+# Lista de eventos futuros
+#
+# Duas implementações com a mesma interface:
+#   agenda(tempo, tipo, doente)   acrescenta um evento
+#   primeiro()                    próximo evento, sem o retirar
+#   retira()                      retira e devolve o próximo evento
+#   len(), bool()
+#
+# Cada evento é um tuplo (tempo, tipo, sequencia, doente). O tipo é um código
+# inteiro (a ordem dos códigos decide empates no mesmo instante) e a sequência
+# é a ordem de agendamento, que desempata eventos do mesmo tipo no mesmo
+# instante sem nunca comparar os identificadores dos doentes.
+#
+# - ListaEventosHeap: heap binária, O(log n) por operação.
+# - CalendarioEventos: calendar queue (Brown, 1988). O tempo é dividido em
+#   baldes de largura fixa dispostos em círculo ("um ano" = num_baldes ×
+#   largura); cada balde é uma lista ordenada curta. Com a largura ajustada ao
+#   espaçamento médio dos eventos, agendar e retirar custam O(1) amortizado.
+#   O número de baldes duplica/reduz a metade com o número de eventos e a
+#   largura é reestimada a partir dos eventos mais próximos.
+
+import heapq
+from bisect import insort
+
+
+class ListaEventosHeap:
+    def __init__(self):
+        self.heap = []
+        self.sequencia = 0
+
+    def agenda(self, tempo, tipo, doente):
+        heapq.heappush(self.heap, (tempo, tipo, self.sequencia, doente))
+        self.sequencia += 1
+
+    def primeiro(self):
+        return self.heap[0]
+
+    def retira(self):
+        return heapq.heappop(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+
+AMOSTRA_LARGURA = 25    # eventos usados para reestimar a largura dos baldes
+
+class CalendarioEventos:
+    def __init__(self, num_baldes=2, largura=1.0):
+        self.sequencia = 0
+        self.n = 0
+        self._inicia(num_baldes, largura, 0)
+
+    def _inicia(self, num_baldes, largura, balde_virtual):
+        self.num_baldes = num_baldes
+        self.largura = largura
+        self.baldes = [[] for _ in range(num_baldes)]
+        # balde virtual = int(tempo / largura), sem dar a volta ao ano
+        self.virtual = balde_virtual
+        self.limite_superior = 2 * num_baldes
+        self.limite_inferior = num_baldes // 2 - 2
+
+    def _insere(self, evento):
+        virtual = int(evento[0] / self.largura)
+        insort(self.baldes[virtual % self.num_baldes], evento)
+        # um evento anterior ao cursor (só acontece se primeiro() avançou o cursor) recua-o
+        if virtual < self.virtual:
+            self.virtual = virtual
+
+    def agenda(self, tempo, tipo, doente):
+        self._insere((tempo, tipo, self.sequencia, doente))
+        self.sequencia += 1
+        self.n += 1
+        if self.n > self.limite_superior:
+            self._redimensiona(2 * self.num_baldes)
+
+    # índice do balde com o próximo evento; avança o cursor até lá
+    def _procura(self):
+        if not self.n:
+            raise IndexError("lista de eventos vazia")
+
+        largura = self.largura
+        virtual = self.virtual
+        for _ in range(self.num_baldes):
+            balde = self.baldes[virtual % self.num_baldes]
+            if balde and int(balde[0][0] / largura) <= virtual:
+                self.virtual = virtual
+                return virtual % self.num_baldes
+            virtual += 1
+
+        # um ano inteiro sem eventos: salta diretamente para o mínimo
+        minimo = min(balde[0] for balde in self.baldes if balde)
+        self.virtual = int(minimo[0] / largura)
+        return self.virtual % self.num_baldes
+
+    def primeiro(self):
+        return self.baldes[self._procura()][0]
+
+    def retira(self):
+        evento = self.baldes[self._procura()].pop(0)
+        self.n -= 1
+        if self.n < self.limite_inferior and self.num_baldes > 2:
+            self._redimensiona(self.num_baldes // 2)
+        return evento
+
+    def _redimensiona(self, num_baldes):
+        eventos = [evento for balde in self.baldes for evento in balde]
+        proximos = heapq.nsmallest(AMOSTRA_LARGURA, eventos)
+
+        # largura = 3 × separação média entre os próximos eventos, ignorando
+        # as separações muito grandes (Brown, 1988)
+        largura = self.largura
+        if len(proximos) > 1:
+            separacoes = [b[0] - a[0] for a, b in zip(proximos, proximos[1:])]
+            media = sum(separacoes) / len(separacoes)
+            pequenas = [s for s in separacoes if s <= 2 * media]
+            if pequenas and sum(pequenas) > 0:
+                largura = 3 * sum(pequenas) / len(pequenas)
+
+        inicio = int(proximos[0][0] / largura) if proximos else 0
+        self._inicia(num_baldes, largura, inicio)
+        for evento in eventos:
+            insort(self.baldes[int(evento[0] / largura) % num_baldes], evento)
+
+    def __len__(self):
+        return self.n
+
+
+LISTAS_EVENTOS = {
+    "heap": ListaEventosHeap,
+    "calendario": CalendarioEventos,
+}
+
+def cria_lista_eventos(nome="heap"):
+    try:
+        return LISTAS_EVENTOS[nome]()
+    except KeyError:
+        raise ValueError(f"lista de eventos desconhecida: {nome}") from None
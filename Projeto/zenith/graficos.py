@@ -0,0 +1,185 @@
+import matplotlib.pyplot as plt
+from matplotlib.patches import Patch
+
+from zenith import simulacao
+from zenith.cache import simula_varios
+
+# Gráficos ----------------
+
+CORES_ESPECIALIDADES = {
+    "cardiologia": "darkred",
+    "ortopedia": "rebeccapurple",
+    "neurologia": "forestgreen"
+}
+
+# Evolução do tamanho da fila ao longo do tempo
+
+def grafico_evolucao_fila(historico_fila):
+    if not historico_fila:
+        print("Sem dados para o gráfico da fila.")
+        return
+
+    tempos = [t for t, _ in historico_fila]
+    tamanhos = [tam for _, tam in historico_fila]
+
+    plt.figure()
+    plt.plot(tempos, tamanhos)
+    plt.xlabel("Tempo (minutos)")
+    plt.ylabel("Tamanho da fila de espera")
+    plt.title("Evolução do tamanho da fila ao longo do tempo")
+    plt.grid(True)
+    plt.show()
+
+# Ocupação dos médicos durante a simulação
+
+def grafico_ocupacao_medicos(medicos, tempo_simulacao=None):
+    if tempo_simulacao is None:
+        tempo_simulacao = simulacao.TEMPO_SIMULACAO
+
+    nomes = []
+    ocupacoes = []
+    cores = []
+    labels = []
+
+    especialidades_usadas = set()
+
+    for m in medicos:
+        nomes.append(f"{m.id}\n({'/'.join(m.especialidades)})")
+        ocupacao = (m.total_tempo_ocupado / tempo_simulacao) * 100
+        ocupacoes.append(ocupacao)
+        cores.append(CORES_ESPECIALIDADES.get(m.especialidade, "gray"))
+
+        if m.especialidade not in especialidades_usadas:
+            labels.append(m.especialidade.capitalize())
+            especialidades_usadas.add(m.especialidade)
+        else:
+            labels.append(None)
+
+    plt.figure()
+    plt.bar(nomes, ocupacoes, color=cores, label=labels)
+
+    plt.xlabel("Médicos")
+    plt.ylabel("Ocupação (%)")
+    plt.title("Ocupação dos médicos durante a simulação")
+    plt.ylim(0, 100)
+    plt.grid(axis="y")
+
+    plt.legend()
+    plt.show()
+
+# Tamanho médio da fila vs Taxa de chegada (λ)
+
+# Cada ponto usa uma semente fixa para poder ser reaproveitado da cache
+
+def grafico_fila_media_vs_lambda(lambdas, semente=0):
+    pedidos = [({"TAXA_CHEGADA": lmbda / 60}, semente) for lmbda in lambdas]  # converter de doentes/hora para por minuto
+    filas_medias = [resultados["fila_media"] for resultados in simula_varios(pedidos)]
+
+    plt.figure()
+    plt.plot(lambdas, filas_medias, marker="o")
+    plt.xlabel("Taxa de chegada λ (doentes/hora)")
+    plt.ylabel("Tamanho médio da fila")
+    plt.title("Tamanho médio da fila vs Taxa de chegada (λ)")
+    plt.grid(True)
+    plt.show()
+
+# Tempo de espera por prioridade: média e percentis (p50/p90/p99)
+
+# estatisticas: resultado de analise.analisa(); a média sozinha esconde a cauda
+
+def grafico_tempo_medio_espera_prioridade(estatisticas):
+    cores = {"vermelho": "red", "amarelo": "yellow", "verde": "green"}
+    por_prioridade = estatisticas["por_prioridade"]
+    prioridades = [p for p in cores if p in por_prioridade]
+    if not prioridades:
+        print("Sem dados de espera.")
+        return
+
+    espera = por_prioridade[prioridades[0]]["espera"]
+    medidas = ["media"] + [chave for chave in espera if chave.startswith("p")]
+    padroes = ["", "//", "..", "xx", "\\\\", "++"]
+    largura = 0.8 / len(medidas)
+
+    plt.figure()
+    legenda = []
+    for j, medida in enumerate(medidas):
+        posicoes = [i + (j - (len(medidas) - 1) / 2) * largura for i in range(len(prioridades))]
+        valores = [por_prioridade[p]["espera"][medida] or 0 for p in prioridades]
+        padrao = padroes[j % len(padroes)]
+        plt.bar(posicoes, valores, width=largura, color=[cores[p] for p in prioridades], edgecolor="black", hatch=padrao)
+        legenda.append(Patch(facecolor="white", edgecolor="black", hatch=padrao, label="Média" if medida == "media" else medida))
+
+    plt.xticks(range(len(prioridades)), prioridades)
+    plt.xlabel("Prioridade")
+    plt.ylabel("Tempo de espera (minutos)")
+    plt.title("Tempo de espera por prioridade (média e percentis)")
+    plt.grid(axis="y")
+    plt.legend(handles=legenda)
+    plt.show()
+
+# Desistências acumuladas ao longo do tempo
+
+def grafico_desistencias_tempo(historico_desistencias):
+    if not historico_desistencias:
+        print("Não houve desistências.")
+        return
+
+    tempos = [t for t, _ in historico_desistencias]
+    acumulado = [d for _, d in historico_desistencias]
+
+    plt.figure()
+    plt.step(tempos, acumulado, where="post")
+    plt.xlabel("Tempo (minutos)")
+    plt.ylabel("Número de desistências")
+    plt.title("Desistências acumuladas ao longo do tempo")
+    plt.grid(True)
+    plt.show()
+
+# Ocupação de médicos ao longo do tempo
+
+def grafico_ocupacao_ao_longo_do_tempo(historico_ocupacao):
+    if not historico_ocupacao:
+        print("Sem dados de ocupação.")
+        return
+
+    tempos = [t for t, _ in historico_ocupacao]
+    ocupados = [o for _, o in historico_ocupacao]
+
+    plt.figure()
+    plt.step(tempos, ocupados, where="post")
+    plt.xlabel("Tempo (minutos)")
+    plt.ylabel("Número de médicos ocupados")
+    plt.title("Ocupação dos médicos ao longo do tempo")
+    plt.grid(True)
+    plt.show()
+
+# Ocupação por especialidade ao longo do tempo (baldes de resultados["ocupacao"])
+
+def grafico_ocupacao_especialidades(ocupacao):
+    linha_temporal = ocupacao["linha_temporal"]
+    if not linha_temporal:
+        print("Sem dados de ocupação.")
+        return
+
+    largura = ocupacao["largura_balde"]
+
+    plt.figure()
+    for esp, fracoes in linha_temporal.items():
+        inicios = [b * largura for b in range(len(fracoes))]
+        percentagens = [f * 100 for f in fracoes]
+        medicos = ocupacao["por_especialidade"][esp]["medicos"]
+        plt.step(
+            inicios + [len(fracoes) * largura],
+            percentagens + percentagens[-1:],
+            where="post",
+            color=CORES_ESPECIALIDADES.get(esp, "gray"),
+            label=f"{esp.capitalize()} ({medicos} médicos)",
+        )
+
+    plt.xlabel("Tempo (minutos)")
+    plt.ylabel("Ocupação (%)")
+    plt.title(f"Ocupação por especialidade (blocos de {largura:g} min)")
+    plt.ylim(0, 105)
+    plt.legend()
+    plt.grid(True)
+    plt.show()
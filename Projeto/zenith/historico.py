@@ -0,0 +1,178 @@
+# Histórico de execuções em SQLite
+#
+# Cada execução de simula() pode ser guardada com a configuração, as métricas
+# de resumo e, opcionalmente, o registo de cada doente. As inserções são feitas
+# em lote numa única transação e há índices sobre os parâmetros da configuração
+# e a data, para que filtrar e comparar milhares de execuções seja imediato.
+
+import json
+import os
+import sqlite3
+import time
+
+from zenith.simulacao import PASTA_PROJETO, VERSAO_MOTOR
+
+CAMINHO_BD = os.path.join(PASTA_PROJETO, "historico_simulacoes.db")
+
+METRICAS = [
+    "fila_media",
+    "fila_max",
+    "media_espera",
+    "media_sistema",
+    "doentes_atendidos",
+    "desistencias",
+    "num_eventos",
+]
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS execucoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    criado_em REAL NOT NULL,
+    versao_motor TEXT NOT NULL,
+    semente INTEGER,
+    num_medicos INTEGER,
+    taxa_chegada REAL,
+    tempo_simulacao REAL,
+    distribuicao TEXT,
+    config TEXT NOT NULL,
+    fila_media REAL,
+    fila_max INTEGER,
+    media_espera REAL,
+    media_sistema REAL,
+    doentes_atendidos INTEGER,
+    desistencias INTEGER,
+    num_eventos INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_execucoes_criado_em ON execucoes (criado_em);
+CREATE INDEX IF NOT EXISTS idx_execucoes_config
+    ON execucoes (num_medicos, taxa_chegada, tempo_simulacao, distribuicao);
+
+CREATE TABLE IF NOT EXISTS doentes (
+    execucao_id INTEGER NOT NULL REFERENCES execucoes (id) ON DELETE CASCADE,
+    doente_id TEXT NOT NULL,
+    especialidade TEXT,
+    prioridade TEXT,
+    chegada REAL,
+    inicio REAL,
+    saida REAL,
+    estado TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_doentes_execucao ON doentes (execucao_id);
+"""
+
+
+def liga(caminho=CAMINHO_BD):
+    ligacao = sqlite3.connect(caminho)
+    ligacao.row_factory = sqlite3.Row
+    ligacao.execute("PRAGMA foreign_keys = ON")
+    ligacao.execute("PRAGMA journal_mode = WAL")
+    ligacao.executescript(ESQUEMA)
+    return ligacao
+
+
+def _linha_execucao(resultados, criado_em):
+    cfg = resultados["config"]
+    return (
+        criado_em,
+        VERSAO_MOTOR,
+        resultados.get("semente"),
+        cfg["NUM_MEDICOS"],
+        cfg["TAXA_CHEGADA"],
+        cfg["TEMPO_SIMULACAO"],
+        cfg["DISTRIBUICAO_TEMPO_CONSULTA"],
+        json.dumps(cfg, sort_keys=True, ensure_ascii=False),
+        *[resultados.get(m) for m in METRICAS],
+    )
+
+def _linhas_doentes(execucao_id, resultados):
+    for did, d in resultados["estado_doentes"].items():
+        yield (
+            execucao_id, did, d["especialidade"], d["prioridade"],
+            d["chegada"], d["inicio"], d["saida"], d["estado"],
+        )
+
+
+# execucoes: lista de resultados de simula(). Tudo numa só transação.
+def guarda_execucoes(execucoes, incluir_doentes=False, caminho=CAMINHO_BD):
+    ligacao = liga(caminho)
+    agora = time.time()
+    ids = []
+
+    colunas = "criado_em, versao_motor, semente, num_medicos, taxa_chegada, tempo_simulacao, distribuicao, config, " + ", ".join(METRICAS)
+    marcadores = ", ".join("?" * (8 + len(METRICAS)))
+
+    with ligacao:
+        cursor = ligacao.cursor()
+        for resultados in execucoes:
+            cursor.execute(
+                f"INSERT INTO execucoes ({colunas}) VALUES ({marcadores})",
+                _linha_execucao(resultados, agora),
+            )
+            ids.append(cursor.lastrowid)
+
+            if incluir_doentes:
+                cursor.executemany(
+                    "INSERT INTO doentes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    _linhas_doentes(cursor.lastrowid, resultados),
+                )
+
+    ligacao.close()
+    return ids
+
+def guarda_execucao(resultados, incluir_doentes=False, caminho=CAMINHO_BD):
+    return guarda_execucoes([resultados], incluir_doentes, caminho)[0]
+
+
+# --- Consultas
+
+# filtros: colunas da tabela execucoes -> valor, ex.: {"num_medicos": 3}
+def lista_execucoes(filtros=None, limite=100, caminho=CAMINHO_BD):
+    filtros = filtros or {}
+    condicoes = []
+    valores = []
+
+    for coluna, valor in filtros.items():
+        if coluna not in ("num_medicos", "taxa_chegada", "tempo_simulacao", "distribuicao", "semente", "versao_motor"):
+            raise ValueError(f"filtro desconhecido: {coluna}")
+        condicoes.append(f"{coluna} = ?")
+        valores.append(valor)
+
+    consulta = "SELECT * FROM execucoes"
+    if condicoes:
+        consulta += " WHERE " + " AND ".join(condicoes)
+    consulta += " ORDER BY criado_em DESC, id DESC LIMIT ?"
+    valores.append(limite)
+
+    ligacao = liga(caminho)
+    linhas = [dict(l) for l in ligacao.execute(consulta, valores)]
+    ligacao.close()
+    return linhas
+
+# média de cada métrica, agrupada pelos parâmetros principais da configuração
+def compara_configuracoes(caminho=CAMINHO_BD):
+    medias = ", ".join(f"AVG({m}) AS {m}" for m in METRICAS)
+    consulta = (
+        f"SELECT num_medicos, taxa_chegada, tempo_simulacao, distribuicao, "
+        f"COUNT(*) AS execucoes, {medias} FROM execucoes "
+        f"GROUP BY num_medicos, taxa_chegada, tempo_simulacao, distribuicao "
+        f"ORDER BY num_medicos, taxa_chegada, tempo_simulacao, distribuicao"
+    )
+    ligacao = liga(caminho)
+    linhas = [dict(l) for l in ligacao.execute(consulta)]
+    ligacao.close()
+    return linhas
+
+def doentes_execucao(execucao_id, caminho=CAMINHO_BD):
+    ligacao = liga(caminho)
+    linhas = [dict(l) for l in ligacao.execute(
+        "SELECT * FROM doentes WHERE execucao_id = ? ORDER BY chegada", (execucao_id,)
+    )]
+    ligacao.close()
+    return linhas
+
+def apaga_historico(caminho=CAMINHO_BD):
+    ligacao = liga(caminho)
+    with ligacao:
+        ligacao.execute("DELETE FROM doentes")
+        ligacao.execute("DELETE FROM execucoes")
+    ligacao.close()
@@ -0,0 +1,316 @@
+# Instantâneos a meio de uma execução e bifurcação de cenários "e se?"
+#
+# cria_instantaneo() corre uma execução até ao instante t e grava o estado
+# completo do motor (relógio, lista de eventos, fila, prazos, médicos, estados
+# dos geradores aleatórios e acumuladores) num ficheiro pickle comprimido.
+# bifurca() parte desse estado, aplica alterações e simula só o resto do dia:
+#
+#   TAXA_CHEGADA                  nova taxa de chegada (doentes/minuto) a partir de t
+#   TEMPO_MEDIO_CONSULTA          consultas iniciadas a partir de t
+#   DISTRIBUICAO_TEMPO_CONSULTA   idem
+#   TEMPO_MAX_ESPERA              paciência dos doentes que entram na fila a partir de t
+#   ADICIONA_MEDICOS              lista de especialidades (ou listas de competências);
+#                                 cada médico entra ao serviço em t
+#   REMOVE_MEDICOS                ids dos médicos que saem em t; um médico em consulta
+#                                 acaba-a, mas já não chama mais ninguém
+#
+# A ocupação por especialidade é calculada sobre o tempo em que cada médico
+# esteve ao serviço: os que entram só contam a partir de t e os que saem deixam
+# de contar quando saem.
+#
+# As chegadas já agendadas depois de t são geradas de novo com a nova taxa
+# (as chegadas de Poisson não têm memória, por isso recomeçar em t é exato).
+# Todas as bifurcações do mesmo instantâneo partem dos mesmos estados
+# aleatórios (números aleatórios comuns), o que torna as diferenças entre
+# cenários menos ruidosas. Cada bifurcação lê o ficheiro de novo, por isso
+# podem correr em paralelo em vários processos.
+#
+#   python -m zenith.instantaneos cria manha.zsn --tempo 360 --semente 1
+#   python -m zenith.instantaneos bifurca manha.zsn --adiciona cardiologia --taxa 15
+#   python -m zenith.instantaneos bifurca manha.zsn --cenarios cenarios.json --trabalhadores 4
+
+import argparse
+import copy
+import gzip
+import json
+import os
+import pickle
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from zenith import historico
+from zenith.eventos import cria_lista_eventos
+from zenith.simulacao import (
+    CHEGADA, ENTRADA, VERSAO_MOTOR, Medico, RodaTemporal, avanca,
+    estado_inicial, gera_chegadas, mascara_especialidades, pessoas, resultados_estado,
+)
+
+ASSINATURA = b"ZINSTANTANEO1\n"
+
+ALTERACOES = [
+    "TAXA_CHEGADA",
+    "TEMPO_MEDIO_CONSULTA",
+    "DISTRIBUICAO_TEMPO_CONSULTA",
+    "TEMPO_MAX_ESPERA",
+    "ADICIONA_MEDICOS",
+    "REMOVE_MEDICOS",
+]
+
+INDICES_PESSOAS = {p["id"]: i for i, p in enumerate(pessoas)}
+
+
+# --- Gravação e leitura
+
+def grava_instantaneo(estado, caminho):
+    if estado["aleatorio"] is random:
+        raise ValueError("só execuções com semente podem ser gravadas num instantâneo")
+
+    # as pessoas ainda por chegar vão como índices de pessoas.json
+    dados = dict(estado)
+    dados["pessoas_disponiveis"] = [INDICES_PESSOAS[p["id"]] for p in estado["pessoas_disponiveis"]]
+
+    temporario = caminho + ".tmp"
+    with gzip.open(temporario, "wb") as f:
+        f.write(ASSINATURA)
+        pickle.dump({"versao": VERSAO_MOTOR, "estado": dados}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, caminho)
+
+def le_instantaneo(caminho):
+    with gzip.open(caminho, "rb") as f:
+        if f.read(len(ASSINATURA)) != ASSINATURA:
+            raise ValueError(f"{caminho}: não é um instantâneo do ZenithSaúde")
+        dados = pickle.load(f)
+
+    if dados["versao"] != VERSAO_MOTOR:
+        raise ValueError(
+            f"{caminho}: instantâneo da versão {dados['versao']} do motor (atual: {VERSAO_MOTOR})"
+        )
+    estado = dados["estado"]
+    estado["pessoas_disponiveis"] = [pessoas[i] for i in estado["pessoas_disponiveis"]]
+    return estado
+
+# corre a execução até ao instante t (exclusive) e, se houver caminho, grava-a
+def cria_instantaneo(config=None, semente=0, tempo=0.0, caminho=None):
+    if semente is None:
+        raise ValueError("só execuções com semente podem ser gravadas num instantâneo")
+    estado = avanca(estado_inicial(config, semente), ate=tempo)
+    if caminho:
+        grava_instantaneo(estado, caminho)
+    return estado
+
+
+# --- Bifurcação
+
+# volta a gerar as chegadas a partir de t (ex.: com outra taxa); as pessoas
+# das chegadas descartadas regressam às disponíveis
+def _reagenda_chegadas(estado, t):
+    eventos = estado["eventos"]
+    pendentes = []
+    while eventos:
+        pendentes.append(eventos.retira())
+
+    nova = cria_lista_eventos(estado["cfg"]["LISTA_EVENTOS"])
+    devolvidas = []
+    for tempo, tipo, _, doente in pendentes:
+        if tipo == CHEGADA:
+            del estado["chegadas"][doente]
+            del estado["tempos_chegada"][doente]
+            devolvidas.append(pessoas[INDICES_PESSOAS[doente]])
+        else:
+            nova.agenda(tempo, tipo, doente)
+
+    estado["eventos"] = nova
+    estado["pessoas_disponiveis"].extend(reversed(devolvidas))
+    gera_chegadas(estado, t)
+
+# as FilasPrazos supõem que os prazos de cada prioridade chegam por ordem
+# crescente; com outra paciência os doentes que entram na fila depois de t
+# podem ter prazos anteriores aos de quem já espera, por isso os prazos
+# pendentes passam para uma RodaTemporal, que não depende dessa ordem
+def _reagenda_prazos(estado, t):
+    anteriores = estado["prazos"]
+    if isinstance(anteriores, RodaTemporal):
+        return
+    roda = RodaTemporal()
+    roda.cursor = int(t // roda.largura)
+    roda.descartados = anteriores.descartados
+    for fila in anteriores.filas.values():
+        for prazo, did in fila:
+            roda.agenda(prazo, did)
+    estado["prazos"] = roda
+
+def aplica_alteracoes(estado, alteracoes):
+    desconhecidas = [chave for chave in alteracoes if chave not in ALTERACOES]
+    if desconhecidas:
+        raise ValueError(f"alterações não suportadas numa bifurcação: {', '.join(desconhecidas)}")
+
+    t = estado["tempo_atual"]
+    cfg = estado["cfg"]
+    medicos = estado["medicos"]
+    bits = estado["fila"].bits
+
+    for chave in ("TEMPO_MEDIO_CONSULTA", "DISTRIBUICAO_TEMPO_CONSULTA"):
+        if chave in alteracoes:
+            cfg[chave] = alteracoes[chave]
+    if "TEMPO_MAX_ESPERA" in alteracoes:
+        cfg["TEMPO_MAX_ESPERA"] = {**cfg["TEMPO_MAX_ESPERA"], **alteracoes["TEMPO_MAX_ESPERA"]}
+        _reagenda_prazos(estado, t)
+
+    if "TAXA_CHEGADA" in alteracoes:
+        if alteracoes["TAXA_CHEGADA"] <= 0:
+            raise ValueError("a taxa de chegada tem de ser positiva")
+        cfg["TAXA_CHEGADA"] = alteracoes["TAXA_CHEGADA"]
+        _reagenda_chegadas(estado, t)
+
+    por_id = {m.id: m for m in medicos}
+    for medico_id in alteracoes.get("REMOVE_MEDICOS", []):
+        if medico_id not in por_id:
+            raise ValueError(f"médico desconhecido: {medico_id}")
+        # sem competências não é escolhido à chegada nem chama doentes da fila
+        por_id[medico_id].mascara = 0
+        estado["ocupacao"].remove_medico(por_id[medico_id], t)
+
+    for competencias in alteracoes.get("ADICIONA_MEDICOS", []):
+        if isinstance(competencias, str):
+            competencias = [competencias]
+        for esp in competencias:
+            if esp not in bits:
+                raise ValueError(f"especialidade desconhecida: {esp}")
+        medico = Medico(f"m{len(medicos)}", competencias[0], list(competencias), mascara_especialidades(competencias, bits))
+        medicos.append(medico)
+        estado["ocupacao"].adiciona_medico(medico, t)
+        estado["eventos"].agenda(t, ENTRADA, len(medicos) - 1)
+
+# instantaneo: estado (fica intacto) ou caminho de um ficheiro
+def bifurca(instantaneo, alteracoes=None, verboso=False):
+    if isinstance(instantaneo, dict):
+        estado = copy.deepcopy(instantaneo)
+    else:
+        estado = le_instantaneo(instantaneo)
+    alteracoes = dict(alteracoes or {})
+    t = estado["tempo_atual"]
+
+    aplica_alteracoes(estado, alteracoes)
+    avanca(estado, verboso=verboso)
+
+    resultados = resultados_estado(estado, verboso)
+    resultados["bifurcacao"] = {"tempo": t, "alteracoes": alteracoes}
+    return resultados
+
+# doentes que entraram depois da bifurcação e foram atendidos depois de esperar
+# mais do que a paciência; com paciência constante tem de ser sempre vazia
+def esperas_excedidas(resultados):
+    if resultados["config"]["PACIENCIA_ALEATORIA"]:
+        return []   # a paciência de cada doente não fica guardada
+    t = resultados["bifurcacao"]["tempo"]
+    tempo_max_espera = resultados["config"]["TEMPO_MAX_ESPERA"]
+    return [
+        (did, d["prioridade"], d["inicio"] - d["chegada"])
+        for did, d in resultados["estado_doentes"].items()
+        if d["inicio"] is not None and d["chegada"] >= t
+        and d["inicio"] - d["chegada"] > tempo_max_espera[d["prioridade"]]
+    ]
+
+def _executa(pedido):
+    caminho, alteracoes = pedido
+    return bifurca(caminho, alteracoes)
+
+# vários cenários a partir do mesmo ficheiro, em paralelo se trabalhadores > 1
+def bifurca_varios(caminho, cenarios, trabalhadores=1):
+    pedidos = [(caminho, alteracoes) for alteracoes in cenarios]
+    if trabalhadores > 1 and len(pedidos) > 1:
+        with ProcessPoolExecutor(max_workers=trabalhadores) as ex:
+            return list(ex.map(_executa, pedidos))
+
+    estado = le_instantaneo(caminho)
+    return [bifurca(estado, alteracoes) for alteracoes in cenarios]
+
+
+# --- Linha de comandos
+
+def _cenarios(args):
+    if args.cenarios:
+        with open(args.cenarios, "r", encoding="utf-8") as f:
+            cenarios = json.load(f)
+        if not isinstance(cenarios, list):
+            raise ValueError(f"{args.cenarios}: os cenários têm de ser uma lista de objetos JSON")
+        return cenarios
+
+    alteracoes = {}
+    if args.taxa is not None:
+        alteracoes["TAXA_CHEGADA"] = args.taxa / 60
+    if args.adiciona:
+        alteracoes["ADICIONA_MEDICOS"] = [texto.split("+") for texto in args.adiciona]
+    if args.remove:
+        alteracoes["REMOVE_MEDICOS"] = args.remove
+    if args.tempo_consulta is not None:
+        alteracoes["TEMPO_MEDIO_CONSULTA"] = args.tempo_consulta
+    return [alteracoes]
+
+def comando_cria(args):
+    config = {}
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    if args.medicos is not None:
+        config["NUM_MEDICOS"] = args.medicos
+    if args.taxa is not None:
+        config["TAXA_CHEGADA"] = args.taxa / 60
+    if args.horas is not None:
+        config["TEMPO_SIMULACAO"] = args.horas * 60
+
+    estado = cria_instantaneo(config, args.semente, args.tempo, args.instantaneo)
+    print(
+        f"Instantâneo em t = {estado['tempo_atual']:.1f} min: {len(estado['fila'])} doentes na fila, "
+        f"{sum(m.ocupado for m in estado['medicos'])} médicos ocupados, "
+        f"{os.path.getsize(args.instantaneo) / 1024:.1f} KiB"
+    )
+
+def comando_bifurca(args):
+    cenarios = [{}] + _cenarios(args)   # o primeiro é o cenário sem alterações
+    nomes = ["base"] + [c.pop("nome", f"cenario {i}") for i, c in enumerate(cenarios[1:], 1)]
+
+    inicio = time.perf_counter()
+    execucoes = bifurca_varios(args.instantaneo, cenarios, args.trabalhadores)
+    duracao = time.perf_counter() - inicio
+
+    print(f"{'cenário':20s}" + "".join(f"{m:>18s}" for m in historico.METRICAS))
+    for nome, resultados in zip(nomes, execucoes):
+        print(f"{nome:20s}" + "".join(f"{resultados[m]:18.2f}" for m in historico.METRICAS))
+    for nome, resultados in zip(nomes, execucoes):
+        excedidas = esperas_excedidas(resultados)
+        if excedidas:
+            print(f"aviso: {nome}: {len(excedidas)} doentes atendidos depois de esgotada a paciência")
+    print(f"\n{len(execucoes)} bifurcações em {duracao:.2f} s")
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Instantâneos a meio de uma execução e cenários bifurcados")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    cria = sub.add_parser("cria", help="corre até ao instante indicado e grava o estado")
+    cria.add_argument("instantaneo")
+    cria.add_argument("--tempo", type=float, required=True, help="instante do instantâneo (minutos)")
+    cria.add_argument("--semente", type=int, default=0)
+    cria.add_argument("--config", metavar="FICHEIRO", help="JSON com as chaves da configuração")
+    cria.add_argument("--medicos", type=int)
+    cria.add_argument("--taxa", type=float, help="taxa de chegada (doentes/hora)")
+    cria.add_argument("--horas", type=float, help="horizonte da simulação (horas)")
+    cria.set_defaults(funcao=comando_cria)
+
+    bif = sub.add_parser("bifurca", help="simula o resto do dia com alterações")
+    bif.add_argument("instantaneo")
+    bif.add_argument("--cenarios", metavar="FICHEIRO", help="JSON com uma lista de alterações (com \"nome\" opcional)")
+    bif.add_argument("--taxa", type=float, help="nova taxa de chegada (doentes/hora)")
+    bif.add_argument("--adiciona", nargs="+", metavar="ESPECIALIDADES", help='médicos a mais, ex.: cardiologia "ortopedia+neurologia"')
+    bif.add_argument("--remove", nargs="+", metavar="ID", help="médicos que saem, ex.: m0 m2")
+    bif.add_argument("--tempo-consulta", type=float, help="tempo médio de consulta (minutos)")
+    bif.add_argument("--trabalhadores", type=int, default=1)
+    bif.set_defaults(funcao=comando_bifurca)
+
+    args = parser.parse_args(argumentos)
+    args.funcao(args)
+
+
+if __name__ == "__main__":
+    main()
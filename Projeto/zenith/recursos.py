@@ -0,0 +1,63 @@
+# Recursos gráficos da interface
+#
+# O logótipo original (1536×1024, cerca de 2 MB) era descodificado pelo Tk em
+# cada janela que o mostra e só depois reduzido com subsample=6. dados_logo()
+# devolve uma cópia já reduzida, guardada em .cache_recursos e refeita quando o
+# original muda (a cópia fica com a data de modificação do original). Os bytes
+# são lidos uma só vez por processo e partilhados por todas as janelas.
+#
+# A redução usa o Pillow; sem ele dados_logo() devolve None e a interface usa
+# o original com subsample, como antes.
+#
+# Este módulo não importa o motor (NumPy, pessoas.json) nem o matplotlib, para
+# que a janela de login abra sem esperar por eles.
+
+import base64
+import os
+
+PASTA_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_RECURSOS = os.path.join(PASTA_PROJETO, ".cache_recursos")
+
+LOGO = os.path.join(PASTA_PROJETO, "logo_zenith_transparente.png")
+REDUCAO_LOGO = 6
+
+
+def imagem_reduzida(origem, reducao, pasta=PASTA_RECURSOS):
+    nome, _ = os.path.splitext(os.path.basename(origem))
+    destino = os.path.join(pasta, f"{nome}_{reducao}.png")
+    estado = os.stat(origem)
+
+    try:
+        atual = os.stat(destino).st_mtime_ns == estado.st_mtime_ns
+    except OSError:
+        atual = False
+
+    if not atual:
+        from PIL import Image
+
+        with Image.open(origem) as imagem:
+            largura, altura = imagem.size
+            # mesmo tamanho que o subsample do Tk (arredondado para cima)
+            tamanho = (-(-largura // reducao), -(-altura // reducao))
+            reduzida = imagem.resize(tamanho, Image.LANCZOS)
+
+        os.makedirs(pasta, exist_ok=True)
+        temporario = destino + ".tmp"
+        reduzida.save(temporario, format="PNG", optimize=True)
+        os.utime(temporario, ns=(estado.st_atime_ns, estado.st_mtime_ns))
+        os.replace(temporario, destino)
+
+    return destino
+
+_dados = {}
+
+# PNG reduzido em base64 (o formato que sg.Image(data=...) aceita), ou None sem Pillow
+def dados_logo(origem=LOGO, reducao=REDUCAO_LOGO):
+    chave = (origem, reducao)
+    if chave not in _dados:
+        try:
+            with open(imagem_reduzida(origem, reducao), "rb") as f:
+                _dados[chave] = base64.b64encode(f.read())
+        except (ImportError, OSError):
+            _dados[chave] = None
+    return _dados[chave]
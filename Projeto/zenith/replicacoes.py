@@ -0,0 +1,127 @@
+# Replicações independentes de simula() com redução de variância
+#
+# - Variáveis antitéticas: as replicações são feitas aos pares com a mesma
+#   semente; o segundo elemento do par usa as uniformes espelhadas (1 - u) nos
+#   intervalos entre chegadas e nas durações das consultas (config "ANTITETICO").
+#   A unidade de estimação passa a ser a média de cada par e n (número de
+#   execuções) tem de ser par.
+# - Variáveis de controlo: a métrica é corrigida com quantidades de valor
+#   esperado conhecido, a taxa de chegada realizada (λ) e a duração média das
+#   consultas realizada (média teórica da distribuição), com coeficientes
+#   estimados por mínimos quadrados na mesma amostra. A variância usa então
+#   n - q - 1 graus de liberdade (q controlos) e a correção só é aplicada com
+#   pelo menos MIN_UNIDADES_CONTROLO unidades; com menos o intervalo seria
+#   otimista.
+#
+# Para cada métrica é devolvida a redução de variância conseguida face a
+# replicações independentes com o mesmo número de execuções.
+
+import math
+
+import numpy as np
+
+from zenith.cache import simula_varios
+from zenith.simulacao import media_teorica_consulta, prepara_config
+
+Z_95 = 1.959963984540054
+
+
+# --- Métricas extraídas de cada execução
+
+def media_espera_prioridade(resultados, prioridade):
+    tempos = resultados["tempos_espera_prioridade"][prioridade]
+    return sum(tempos) / len(tempos) if tempos else 0
+
+METRICAS = {
+    "media_espera": lambda r: r["media_espera"],
+    "media_espera_vermelho": lambda r: media_espera_prioridade(r, "vermelho"),
+    "media_sistema": lambda r: r["media_sistema"],
+    "fila_media": lambda r: r["fila_media"],
+    "desistencias": lambda r: r["desistencias"],
+}
+
+CONTROLOS = ["taxa_chegada_realizada", "media_tempo_consulta_realizada"]
+MIN_UNIDADES_CONTROLO = 10
+
+
+# --- Estimadores
+
+def _correcao_controlo(y, controlos, medias_controlo):
+    # Y_cv = Y - (C - μ) β, com β dos mínimos quadrados de Y centrado em C centrado
+    c = controlos - controlos.mean(axis=0)
+    beta, *_ = np.linalg.lstsq(c, y - y.mean(), rcond=None)
+    return y - (controlos - medias_controlo) @ beta
+
+# graus_perdidos: parâmetros estimados na mesma amostra além da média (ex.: os
+# coeficientes das variáveis de controlo)
+def estimativa_media(unidades, n_execucoes, graus_perdidos=0):
+    n = len(unidades)
+    media = float(np.mean(unidades))
+    graus = n - 1 - graus_perdidos
+    if graus > 0:
+        variancia = float(np.sum((unidades - media) ** 2) / graus / n)
+    else:
+        variancia = float("nan")
+    return {
+        "media": media,
+        "semi_amplitude_ic95": Z_95 * math.sqrt(variancia) if graus > 0 else float("nan"),
+        "variancia_estimador": variancia,
+        "n_execucoes": n_execucoes,
+    }
+
+
+def replica(config=None, n=100, semente=0, antiteticas=False, variaveis_controlo=False,
+            trabalhadores=1, usar_cache=True, metricas=None):
+    cfg = prepara_config(config)
+    if metricas is None:
+        metricas = METRICAS
+
+    if antiteticas:
+        if n < 2 or n % 2:
+            raise ValueError(f"com variáveis antitéticas o número de execuções tem de ser par (n = {n})")
+        n_pares = n // 2
+        pedidos = []
+        for i in range(n_pares):
+            pedidos.append((dict(cfg, ANTITETICO=False), semente + i))
+            pedidos.append((dict(cfg, ANTITETICO=True), semente + i))
+    else:
+        pedidos = [(cfg, semente + i) for i in range(n)]
+
+    execucoes = simula_varios(pedidos, trabalhadores, usar_cache=usar_cache)
+
+    medias_controlo = np.array([
+        cfg["TAXA_CHEGADA"],
+        media_teorica_consulta(cfg["DISTRIBUICAO_TEMPO_CONSULTA"], cfg["TEMPO_MEDIO_CONSULTA"]),
+    ])
+    controlos = np.array([[r[c] for c in CONTROLOS] for r in execucoes])
+
+    estimativas = {}
+    for nome, extrai in metricas.items():
+        y = np.array([extrai(r) for r in execucoes], dtype=float)
+        # variância de referência: replicações independentes com o mesmo número de execuções
+        variancia_independente = np.var(y, ddof=1) / len(y)
+
+        unidades = y
+        unidades_controlo = controlos
+        if antiteticas:
+            unidades = y.reshape(-1, 2).mean(axis=1)
+            unidades_controlo = controlos.reshape(-1, 2, len(CONTROLOS)).mean(axis=1)
+
+        controlo_aplicado = variaveis_controlo and len(unidades) >= MIN_UNIDADES_CONTROLO
+        if controlo_aplicado:
+            unidades = _correcao_controlo(unidades, unidades_controlo, medias_controlo)
+
+        estimativa = estimativa_media(unidades, len(execucoes), len(CONTROLOS) if controlo_aplicado else 0)
+        estimativa["controlo_aplicado"] = controlo_aplicado
+        if estimativa["variancia_estimador"] > 0:
+            estimativa["reducao_variancia"] = float(variancia_independente / estimativa["variancia_estimador"])
+        else:
+            estimativa["reducao_variancia"] = float("nan")
+        estimativas[nome] = estimativa
+
+    return {
+        "config": cfg,
+        "antiteticas": antiteticas,
+        "variaveis_controlo": variaveis_controlo,
+        "estimativas": estimativas,
+    }
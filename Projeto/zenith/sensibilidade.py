@@ -0,0 +1,295 @@
+# Análise de sensibilidade: que parâmetros determinam de facto a espera?
+#
+# Cada fator varia num intervalo (ou numa lista de valores) e é amostrado por
+# hipercubo latino: cada intervalo é dividido em n estratos e cada estrato é
+# usado exatamente uma vez, o que cobre o espaço muito melhor do que uma
+# grelha com o mesmo número de execuções.
+#
+# - analise_hipercubo(): uma amostra de n pontos e coeficientes de regressão
+#   padronizados (SRC) de cada fator; barato, mas só mede efeitos lineares.
+#   Um fator categórico (lista de valores) não tem ordem, por isso entra na
+#   regressão como uma coluna 0/1 por categoria (exceto a primeira, a
+#   referência) e é mostrado por categoria: média da métrica e efeito em
+#   relação à referência, nas unidades da métrica.
+# - indices_sobol(): esquema de Saltelli com duas matrizes A e B de hipercubo
+#   latino e as matrizes AB_i (A com a coluna i de B), n·(d + 2) pontos.
+#   Índices de primeira ordem (Saltelli 2010) e totais (Jansen), com intervalos
+#   bootstrap. S_i = fração da variância explicada só pelo fator i; ST_i =
+#   fração em que o fator i intervém, incluindo interações.
+#
+# Cada ponto é avaliado com várias replicações (sementes comuns a todos os
+# pontos, para que o ruído das sementes não se confunda com os fatores) e os
+# pontos são calculados em paralelo através de simula_varios (e da cache).
+#
+#   python -m zenith.sensibilidade --metodo sobol --n 32 --replicacoes 3 --trabalhadores 4
+
+import argparse
+import math
+
+import numpy as np
+
+from zenith.cache import simula_varios
+from zenith.replicacoes import METRICAS
+from zenith.simulacao import DISTRIBUICOES, prepara_config
+
+# intervalo (mínimo, máximo) ou lista de valores possíveis de cada fator;
+# intervalos com limites inteiros dão valores inteiros
+FATORES = {
+    "NUM_MEDICOS": (2, 8),
+    "TAXA_CHEGADA": (5 / 60, 30 / 60),
+    "TEMPO_MEDIO_CONSULTA": (8.0, 25.0),
+    "TEMPO_SIMULACAO": (4 * 60, 12 * 60),
+    "DISTRIBUICAO_TEMPO_CONSULTA": DISTRIBUICOES,
+    "PACIENCIA_AMARELO": (30.0, 120.0),
+    "PACIENCIA_VERDE": (15.0, 60.0),
+    "PESO_VERMELHO": (0.05, 0.30),
+    "PESO_AMARELO": (0.20, 0.50),
+}
+
+REAMOSTRAGENS = 200     # bootstrap dos índices de Sobol
+
+
+# --- Amostragem
+
+def hipercubo_latino(n, d, rng):
+    estratos = np.array([rng.permutation(n) for _ in range(d)]).T
+    return (estratos + rng.random((n, d))) / n
+
+def valor_fator(intervalo, u):
+    if isinstance(intervalo, list):
+        return intervalo[min(int(u * len(intervalo)), len(intervalo) - 1)]
+    minimo, maximo = intervalo
+    if isinstance(minimo, int) and isinstance(maximo, int):
+        return min(minimo + int(u * (maximo - minimo + 1)), maximo)
+    return minimo + u * (maximo - minimo)
+
+# u: linha do plano em [0, 1)^d, pela ordem de fatores
+def config_ponto(base, fatores, u):
+    cfg = dict(base)
+    cfg["TEMPO_MAX_ESPERA"] = dict(cfg["TEMPO_MAX_ESPERA"])
+    pesos = dict(cfg["PESOS_PRIORIDADE"])
+
+    for (nome, intervalo), ui in zip(fatores.items(), u):
+        valor = valor_fator(intervalo, ui)
+        if nome == "PACIENCIA_AMARELO":
+            cfg["TEMPO_MAX_ESPERA"]["amarelo"] = valor
+        elif nome == "PACIENCIA_VERDE":
+            cfg["TEMPO_MAX_ESPERA"]["verde"] = valor
+        elif nome == "PESO_VERMELHO":
+            pesos["vermelho"] = valor
+        elif nome == "PESO_AMARELO":
+            pesos["amarelo"] = valor
+        else:
+            cfg[nome] = valor
+
+    # o verde fica com o resto, para os pesos somarem 1
+    pesos["verde"] = max(0.0, 1 - pesos["vermelho"] - pesos["amarelo"])
+    cfg["PESOS_PRIORIDADE"] = pesos
+    return cfg
+
+
+# --- Avaliação (pontos × replicações, em paralelo)
+
+def avalia(base, fatores, plano, replicacoes=3, semente=0, trabalhadores=1,
+           usar_cache=True, metricas=None):
+    if metricas is None:
+        metricas = METRICAS
+
+    pedidos = []
+    for u in plano:
+        cfg = config_ponto(base, fatores, u)
+        for r in range(replicacoes):
+            pedidos.append((cfg, semente + r))
+
+    execucoes = simula_varios(pedidos, trabalhadores, usar_cache=usar_cache)
+
+    # média das replicações de cada ponto
+    return {
+        nome: np.array([extrai(r) for r in execucoes], dtype=float).reshape(len(plano), replicacoes).mean(axis=1)
+        for nome, extrai in metricas.items()
+    }
+
+
+# --- Hipercubo latino com coeficientes de regressão padronizados
+
+# colunas da regressão: os fatores contínuos tal como foram amostrados e os
+# categóricos em colunas 0/1; devolve também, para cada fator categórico, o
+# índice da categoria de cada ponto e as colunas das suas categorias
+def _matriz_regressao(plano, fatores):
+    colunas = []
+    continuos = {}
+    categoricos = {}
+    for i, (nome, intervalo) in enumerate(fatores.items()):
+        if isinstance(intervalo, list):
+            categoria = np.minimum((plano[:, i] * len(intervalo)).astype(int), len(intervalo) - 1)
+            categoricos[nome] = (categoria, list(range(len(colunas), len(colunas) + len(intervalo) - 1)))
+            for k in range(1, len(intervalo)):
+                colunas.append((categoria == k).astype(float))
+        else:
+            continuos[nome] = len(colunas)
+            colunas.append(plano[:, i])
+    return np.column_stack(colunas), continuos, categoricos
+
+# devolve os coeficientes padronizados, os coeficientes nas unidades de x e y e o R²
+def _src(x, y):
+    desvio_x = x.std(axis=0)
+    desvio_y = y.std()
+    if desvio_y == 0:
+        return np.zeros(x.shape[1]), np.zeros(x.shape[1]), float("nan")
+    xc = (x - x.mean(axis=0)) / np.where(desvio_x > 0, desvio_x, 1)
+    yc = (y - y.mean()) / desvio_y
+    beta, *_ = np.linalg.lstsq(xc, yc, rcond=None)
+    r2 = 1 - np.sum((yc - xc @ beta) ** 2) / np.sum(yc ** 2)
+    brutos = np.where(desvio_x > 0, beta * desvio_y / np.where(desvio_x > 0, desvio_x, 1), np.nan)
+    return beta, brutos, float(r2)
+
+def analise_hipercubo(config=None, n=100, fatores=None, replicacoes=3, semente=0,
+                      trabalhadores=1, usar_cache=True, metricas=None):
+    base = prepara_config(config)
+    if fatores is None:
+        fatores = FATORES
+
+    plano = hipercubo_latino(n, len(fatores), np.random.default_rng(semente))
+    saidas = avalia(base, fatores, plano, replicacoes, semente, trabalhadores, usar_cache, metricas)
+    x, continuos, categoricos = _matriz_regressao(plano, fatores)
+
+    indices = {}
+    for metrica, y in saidas.items():
+        beta, brutos, r2 = _src(x, y)
+        por_categoria = {}
+        for nome, (categoria, colunas) in categoricos.items():
+            # a primeira categoria é a referência (efeito 0)
+            efeitos = [0.0] + [float(brutos[c]) for c in colunas]
+            por_categoria[nome] = {
+                valor: {
+                    "media": float(y[categoria == k].mean()) if np.any(categoria == k) else float("nan"),
+                    "efeito": efeitos[k],
+                }
+                for k, valor in enumerate(fatores[nome])
+            }
+        indices[metrica] = {
+            "src": {nome: float(beta[c]) for nome, c in continuos.items()},
+            "categorias": por_categoria,
+            "r2": r2,
+        }
+
+    return {
+        "metodo": "hipercubo",
+        "config": base,
+        "fatores": list(fatores),
+        "execucoes": n * replicacoes,
+        "indices": indices,
+    }
+
+
+# --- Índices de Sobol (Saltelli / Jansen)
+
+def _sobol(f_a, f_b, f_ab):
+    variancia = np.var(np.concatenate((f_a, f_b)), ddof=1)
+    if variancia == 0:
+        zeros = np.zeros(f_ab.shape[0])
+        return zeros, zeros
+    primeira = np.mean(f_b * (f_ab - f_a), axis=1) / variancia
+    total = 0.5 * np.mean((f_a - f_ab) ** 2, axis=1) / variancia
+    return primeira, total
+
+def indices_sobol(config=None, n=64, fatores=None, replicacoes=3, semente=0,
+                  trabalhadores=1, usar_cache=True, metricas=None, reamostragens=REAMOSTRAGENS):
+    base = prepara_config(config)
+    if fatores is None:
+        fatores = FATORES
+    d = len(fatores)
+
+    rng = np.random.default_rng(semente)
+    a = hipercubo_latino(n, d, rng)
+    b = hipercubo_latino(n, d, rng)
+    ab = np.repeat(a[np.newaxis], d, axis=0)
+    for i in range(d):
+        ab[i, :, i] = b[:, i]
+
+    plano = np.concatenate((a, b, ab.reshape(d * n, d)))
+    saidas = avalia(base, fatores, plano, replicacoes, semente, trabalhadores, usar_cache, metricas)
+
+    indices = {}
+    for metrica, y in saidas.items():
+        f_a, f_b, f_ab = y[:n], y[n:2 * n], y[2 * n:].reshape(d, n)
+        primeira, total = _sobol(f_a, f_b, f_ab)
+
+        # bootstrap: as mesmas linhas reamostradas em A, B e em todas as AB_i
+        linhas = rng.integers(0, n, size=(reamostragens, n))
+        amostras = [_sobol(f_a[l], f_b[l], f_ab[:, l]) for l in linhas]
+        ic_primeira = np.percentile([s[0] for s in amostras], [2.5, 97.5], axis=0)
+        ic_total = np.percentile([s[1] for s in amostras], [2.5, 97.5], axis=0)
+
+        indices[metrica] = {
+            nome: {
+                "primeira_ordem": float(primeira[i]),
+                "primeira_ordem_ic95": [float(ic_primeira[0, i]), float(ic_primeira[1, i])],
+                "total": float(total[i]),
+                "total_ic95": [float(ic_total[0, i]), float(ic_total[1, i])],
+            }
+            for i, nome in enumerate(fatores)
+        }
+
+    return {
+        "metodo": "sobol",
+        "config": base,
+        "fatores": list(fatores),
+        "execucoes": len(plano) * replicacoes,
+        "indices": indices,
+    }
+
+
+def mostra(analise, metrica):
+    print(f"\n{metrica} ({analise['execucoes']} execuções)")
+    indices = analise["indices"][metrica]
+
+    if analise["metodo"] == "sobol":
+        ordem = sorted(indices, key=lambda f: -indices[f]["total"])
+        for fator in ordem:
+            i = indices[fator]
+            print(
+                f"  {fator:30s} S1 = {i['primeira_ordem']:6.3f} "
+                f"[{i['primeira_ordem_ic95'][0]:6.3f}, {i['primeira_ordem_ic95'][1]:6.3f}]  "
+                f"ST = {i['total']:6.3f} [{i['total_ic95'][0]:6.3f}, {i['total_ic95'][1]:6.3f}]"
+            )
+    else:
+        src = indices["src"]
+        for fator in sorted(src, key=lambda f: -abs(src[f])):
+            print(f"  {fator:30s} SRC = {src[fator]:+6.3f}")
+        for fator, categorias in indices["categorias"].items():
+            referencia = next(iter(categorias))
+            print(f"  {fator} (efeito em relação a {referencia}):")
+            for valor, c in categorias.items():
+                print(f"    {valor:28s} média = {c['media']:8.3f}  efeito = {c['efeito']:+8.3f}")
+        if not math.isnan(indices["r2"]):
+            print(f"  R² do modelo linear = {indices['r2']:.3f}")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Análise de sensibilidade do motor de simulação")
+    parser.add_argument("--metodo", choices=["sobol", "hipercubo"], default="sobol")
+    parser.add_argument("--n", type=int, default=32, help="pontos base (sobol usa n·(d + 2))")
+    parser.add_argument("--replicacoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--trabalhadores", type=int, default=1)
+    parser.add_argument("--sem-cache", action="store_true")
+    parser.add_argument("--metrica", choices=list(METRICAS), action="append",
+                        help="métricas a mostrar (por omissão, todas)")
+    args = parser.parse_args(argumentos)
+
+    funcao = indices_sobol if args.metodo == "sobol" else analise_hipercubo
+    analise = funcao(
+        n=args.n,
+        replicacoes=args.replicacoes,
+        semente=args.semente,
+        trabalhadores=args.trabalhadores,
+        usar_cache=not args.sem_cache,
+    )
+
+    for metrica in args.metrica or list(METRICAS):
+        mostra(analise, metrica)
+
+
+if __name__ == "__main__":
+    main()
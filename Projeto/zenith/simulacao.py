@@ -0,0 +1,1178 @@
+import heapq
+import math
+import os
+import random
+import time
+from collections import deque
+import numpy as np     #gerar valores aleatórios segundo distribuições estatísticas
+import json
+
+from zenith.demografia import Triagem
+from zenith.eventos import cria_lista_eventos
+
+PASTA_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def carregarBD(nome_ficheiro):
+    with open(nome_ficheiro, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+pessoas = carregarBD(os.path.join(PASTA_PROJETO, "pessoas.json"))
+
+# Versão do motor: muda sempre que uma alteração muda os resultados para a
+# mesma configuração e semente (invalida a cache de resultados)
+VERSAO_MOTOR = "5"
+
+# Parâmetros da aplicação
+# ---
+NUM_MEDICOS = 3           #disponíveis
+TAXA_CHEGADA = 10 / 60    # 10 doentes por h -> para min
+TEMPO_MEDIO_CONSULTA = 15
+TEMPO_SIMULACAO = 8 * 60  # aprox 8h
+DISTRIBUICAO_TEMPO_CONSULTA = "exponential"
+DISTRIBUICOES = ["exponential", "normal", "uniform"]
+
+ESPECIALIDADES = ["cardiologia", "ortopedia", "neurologia"]
+PRIORIDADES = {"vermelho": 0, "amarelo": 1, "verde": 2} # menor número = maior prioridade
+
+# Tipos de evento: no mesmo instante, chegadas antes de desistências antes de saídas
+# (e antes das entradas de médicos ao serviço, que só existem em bifurcações)
+CHEGADA = 0
+DESISTENCIA = 1
+SAIDA = 2
+ENTRADA = 3
+NOMES_EVENTOS = {CHEGADA: "chegada", DESISTENCIA: "desistência", SAIDA: "saída", ENTRADA: "entrada de médico"}
+
+TEMPO_MAX_ESPERA = {"vermelho": float("inf"), "amarelo": 60, "verde": 30}
+
+# Probabilidade de cada cor na triagem
+PESOS_PRIORIDADE = {"vermelho": 0.15, "amarelo": 0.35, "verde": 0.50}
+
+# False -> cada doente desiste exatamente ao fim de TEMPO_MAX_ESPERA[prioridade]
+# True  -> a paciência é exponencial com essa média (usa uma roda temporal)
+PACIENCIA_ALEATORIA = False
+
+# False -> especialidade equiprovável e cor com PESOS_PRIORIDADE, iguais para todos
+# True  -> ambas condicionadas à idade e ao sexo do doente (ver zenith.demografia)
+TRIAGEM_DEMOGRAFICA = False
+
+INSTRUMENTACAO = False    # contadores e tempos por tipo de evento (ver Instrumentacao)
+
+# Competências de cada médico, ex.: [["cardiologia", "ortopedia"], ["neurologia"]].
+# None -> um médico por especialidade e os restantes com uma especialidade aleatória.
+COMPETENCIAS_MEDICOS = None
+
+# Qual o doente compatível que um médico livre chama:
+#   "maior_prioridade" -> maior prioridade e, em empate, o que chegou primeiro
+#   "mais_antigo"      -> o que espera há mais tempo
+POLITICAS_DESPACHO = ["maior_prioridade", "mais_antigo"]
+POLITICA_DESPACHO = "maior_prioridade"
+
+# Lista de eventos futuros (ver zenith.eventos): "heap" ou "calendario"
+LISTAS_EVENTOS = ["heap", "calendario"]
+LISTA_EVENTOS = "heap"
+
+
+# --- Configuração de uma execução
+# Config = dicionário com as mesmas chaves dos parâmetros acima.
+# Por omissão usa os valores globais atuais (os que a janela de configuração altera).
+
+def config_atual():
+    return {
+        "NUM_MEDICOS": NUM_MEDICOS,
+        "TAXA_CHEGADA": TAXA_CHEGADA,
+        "TEMPO_MEDIO_CONSULTA": TEMPO_MEDIO_CONSULTA,
+        "TEMPO_SIMULACAO": TEMPO_SIMULACAO,
+        "DISTRIBUICAO_TEMPO_CONSULTA": DISTRIBUICAO_TEMPO_CONSULTA,
+        "ESPECIALIDADES": list(ESPECIALIDADES),
+        "TEMPO_MAX_ESPERA": dict(TEMPO_MAX_ESPERA),
+        "PESOS_PRIORIDADE": dict(PESOS_PRIORIDADE),
+        "COMPETENCIAS_MEDICOS": COMPETENCIAS_MEDICOS,
+        "POLITICA_DESPACHO": POLITICA_DESPACHO,
+        "PACIENCIA_ALEATORIA": PACIENCIA_ALEATORIA,
+        "TRIAGEM_DEMOGRAFICA": TRIAGEM_DEMOGRAFICA,
+        "LISTA_EVENTOS": LISTA_EVENTOS,
+    }
+
+# Competências em texto: médicos separados por ";" e especialidades por "+",
+# ex.: "cardiologia+ortopedia; neurologia". Texto vazio -> None.
+
+def le_competencias(texto, especialidades=None):
+    if especialidades is None:
+        especialidades = ESPECIALIDADES
+
+    competencias = []
+    for parte in texto.split(";"):
+        if parte.strip():
+            medico = [esp.strip().lower() for esp in parte.split("+") if esp.strip()]
+            for esp in medico:
+                if esp not in especialidades:
+                    raise ValueError(f"especialidade desconhecida: {esp}")
+            competencias.append(medico)
+
+    return competencias if competencias else None
+
+def escreve_competencias(competencias):
+    if not competencias:
+        return ""
+    return "; ".join("+".join(medico) for medico in competencias)
+
+def prepara_config(config=None):
+    cfg = config_atual()
+    if config:
+        cfg.update(config)
+    return cfg
+
+
+# --- Modelo para o evento (cd um é um tuplo)
+# Evento = (tempo: Float, tipo: Int, sequencia: Int, doente: String)
+# --- Funções de manipulação
+def e_tempo(e):
+    return e[0]
+
+def e_tipo(e):
+    return e[1]
+
+def e_doente(e):
+    return e[3]
+
+# Médicos
+
+# especialidade: a principal (usada nas cores dos gráficos)
+# especialidades: todas as que o médico cobre; mascara: as mesmas em bits
+
+class Medico:
+    def __init__(self, id, especialidade, especialidades=None, mascara=0):
+        self.id = id
+        self.especialidade = especialidade
+        self.especialidades = especialidades if especialidades else [especialidade]
+        self.mascara = mascara
+        self.ocupado = False
+        self.doente_corrente = None
+        self.total_tempo_ocupado = 0.0
+        self.inicio_ultima_consulta = 0.0
+
+    def iniciar_consulta(self, doente, tempo_atual):
+        self.ocupado = True
+        self.doente_corrente = doente
+        self.inicio_ultima_consulta = tempo_atual
+
+    # só conta o tempo dentro do horizonte (uma consulta iniciada depois dele não conta)
+    def terminar_consulta(self, tempo_atual, tempo_limite=None):
+        if tempo_limite is None:
+            tempo_limite = TEMPO_SIMULACAO
+        self.ocupado = False
+        tempo_fim = min(tempo_atual, tempo_limite)
+        self.total_tempo_ocupado += max(0.0, tempo_fim - min(self.inicio_ultima_consulta, tempo_limite))
+        self.doente_corrente = None
+
+# Doentes
+
+class Doente:
+    def __init__(self, id, nome, especialidade, prioridade):
+        self.id = id
+        self.nome = nome
+        self.especialidade = especialidade
+        self.prioridade = prioridade
+
+# --- Utilização das distribuições para gerar chegadas e durações das consultas
+# rng: np.random (estado global) ou um np.random.RandomState com semente própria
+# antitetico: usa a uniforme espelhada (1 - u) em vez de u. O RandomState gera a
+# exponencial como -log(1 - u), a normal é simétrica e a uniforme é linear em u,
+# por isso cada valor antitético consome exatamente os mesmos números aleatórios.
+
+def gera_intervalo_tempo_chegada(lmbda, rng=np.random, antitetico=False):
+    if antitetico:
+        return -math.log(max(rng.random_sample(), 1e-300)) / lmbda
+    return rng.exponential(1 / lmbda) #poisson
+
+def gera_tempo_consulta(distribuicao=None, media=None, rng=np.random, antitetico=False):
+    if distribuicao is None:
+        distribuicao = DISTRIBUICAO_TEMPO_CONSULTA
+    if media is None:
+        media = TEMPO_MEDIO_CONSULTA
+
+    if distribuicao == "exponential":
+        if antitetico:
+            return -media * math.log(max(rng.random_sample(), 1e-300))
+        return rng.exponential(media)
+    elif distribuicao == "normal":
+        valor = rng.normal(media, 5)
+        if antitetico:
+            valor = 2 * media - valor
+        return max(0, valor)
+    elif distribuicao == "uniform":
+        valor = rng.uniform(media * 0.5, media * 1.5)
+        if antitetico:
+            valor = 2 * media - valor
+        return valor
+
+# Valor esperado de gera_tempo_consulta (a normal é truncada em 0)
+
+def media_teorica_consulta(distribuicao=None, media=None):
+    if distribuicao is None:
+        distribuicao = DISTRIBUICAO_TEMPO_CONSULTA
+    if media is None:
+        media = TEMPO_MEDIO_CONSULTA
+
+    if distribuicao == "normal":
+        desvio = 5
+        z = media / desvio
+        fi = math.exp(-z * z / 2) / math.sqrt(2 * math.pi)
+        Fi = 0.5 * (1 + math.erf(z / math.sqrt(2)))
+        return media * Fi + desvio * fi
+    return media
+
+# --- Funções auxiliares
+
+# --- Cada especialidade corresponde a um bit; um médico cobre a união dos seus bits
+
+def bits_especialidades(especialidades):
+    return {esp: 1 << i for i, esp in enumerate(especialidades)}
+
+def mascara_especialidades(especialidades, bits):
+    mascara = 0
+    for esp in especialidades:
+        mascara |= bits[esp]
+    return mascara
+
+# --- Procura o primeiro médico livre e da especialidade certa
+
+
+def procuraMedicoEspecialidade(medicos, bit_especialidade):
+    medico = None
+    encontrado = False
+    i = 0
+
+    while i < len(medicos) and not encontrado: #percorre a lista de médicos
+        if (not medicos[i].ocupado and medicos[i].mascara & bit_especialidade): #procura um medico livre e se tem a especialidade requerida
+            medico = medicos[i]
+            encontrado = True #retorna o primeiro que encontra ou none
+        i += 1
+
+    return medico
+
+# --- Fila de espera indexada por especialidade
+# Um heap por especialidade, ordenado segundo a política de despacho. Um doente
+# que desiste só é apagado de em_fila; a entrada no heap é descartada quando
+# chega ao topo. "nao_vazias" tem um bit por especialidade com doentes à espera,
+# o que permite saber em O(1) se um médico tem algum doente compatível.
+# escolhe() custa O(competências do médico · log n).
+
+class FilaEspera:
+    def __init__(self, especialidades, politica="maior_prioridade"):
+        self.bits = bits_especialidades(especialidades)
+        self.politica = politica
+        self.heaps = {esp: [] for esp in especialidades}
+        self.contagem = {esp: 0 for esp in especialidades}
+        self.em_fila = {}          # did -> (prio, t, especialidade), por ordem de chegada
+        self.nao_vazias = 0
+
+    def __len__(self):
+        return len(self.em_fila)
+
+    def __contains__(self, did):
+        return did in self.em_fila
+
+    def _chave(self, prio, t, did):
+        if self.politica == "mais_antigo":
+            return (t, prio, did)
+        return (prio, t, did)
+
+    def entra(self, prio, t, did, especialidade):
+        heapq.heappush(self.heaps[especialidade], self._chave(prio, t, did))
+        self.em_fila[did] = (prio, t, especialidade)
+        self.contagem[especialidade] += 1
+        self.nao_vazias |= self.bits[especialidade]
+
+    def sai(self, did):
+        prio, t, especialidade = self.em_fila.pop(did)
+        self.contagem[especialidade] -= 1
+        if self.contagem[especialidade] == 0:
+            self.nao_vazias &= ~self.bits[especialidade]
+        return (prio, t, did)
+
+    def _topo(self, especialidade):
+        heap = self.heaps[especialidade]
+        while heap and heap[0][2] not in self.em_fila:
+            heapq.heappop(heap)    # doente que já desistiu
+        return heap[0] if heap else None
+
+    def escolhe(self, medico):
+        if not (medico.mascara & self.nao_vazias):
+            return None
+
+        melhor = None
+        melhor_esp = None
+        for esp in medico.especialidades:
+            if self.contagem[esp]:
+                topo = self._topo(esp)
+                if melhor is None or topo < melhor:
+                    melhor = topo
+                    melhor_esp = esp
+
+        if melhor is None:
+            return None
+        heapq.heappop(self.heaps[melhor_esp])
+        return self.sai(melhor[2])
+
+    def ids(self):
+        return list(self.em_fila)
+
+    def entradas(self):
+        return [(prio, t, did) for did, (prio, t, _) in self.em_fila.items()]
+
+# --- Prazos de desistência ----------------
+# Os prazos não entram na lista de eventos: ficam numa destas estruturas e o
+# ciclo principal compara o próximo prazo com o próximo evento. Um prazo de um
+# doente que entretanto foi atendido não é apagado, só é descartado quando
+# chega à frente (invalidação preguiçosa). Ambas as estruturas têm a mesma
+# interface: agenda(), proximo(ativos) e retira().
+
+# Paciência constante por prioridade: os prazos de cada prioridade chegam por
+# ordem crescente, por isso basta uma FIFO por prioridade.
+
+class FilasPrazos:
+    def __init__(self):
+        self.filas = {}
+        self.n = 0
+        self.descartados = 0
+        self._fila_proxima = None
+
+    def __len__(self):
+        return self.n
+
+    def agenda(self, prazo, did, prioridade):
+        if prioridade not in self.filas:
+            self.filas[prioridade] = deque()
+        self.filas[prioridade].append((prazo, did))
+        self.n += 1
+
+    def proximo(self, ativos):
+        melhor = None
+        for prioridade, fila in self.filas.items():
+            while fila and fila[0][1] not in ativos:
+                fila.popleft()
+                self.n -= 1
+                self.descartados += 1
+            if fila and (melhor is None or fila[0] < melhor):
+                melhor = fila[0]
+                self._fila_proxima = fila
+        return melhor
+
+    def retira(self):
+        self.n -= 1
+        return self._fila_proxima.popleft()
+
+# Paciência aleatória: roda temporal com baldes de largura fixa (minutos).
+# Cada prazo vai para o balde da sua fatia de tempo; quando o cursor chega a
+# um balde, os prazos dessa fatia passam para um pequeno heap (corrente).
+
+class RodaTemporal:
+    def __init__(self, largura=5.0, num_baldes=64):
+        self.largura = largura
+        self.baldes = [[] for _ in range(num_baldes)]
+        self.corrente = []
+        self.cursor = 0
+        self.n = 0
+        self.descartados = 0
+
+    def __len__(self):
+        return self.n
+
+    def agenda(self, prazo, did, prioridade=None):
+        if prazo == math.inf:
+            return      # paciência infinita: nunca desiste
+        fatia = int(prazo // self.largura)
+        if fatia <= self.cursor:
+            heapq.heappush(self.corrente, (prazo, did))
+        else:
+            self.baldes[fatia % len(self.baldes)].append((prazo, did))
+        self.n += 1
+
+    def proximo(self, ativos):
+        while self.n:
+            while self.corrente:
+                if self.corrente[0][1] in ativos:
+                    return self.corrente[0]
+                heapq.heappop(self.corrente)
+                self.n -= 1
+                self.descartados += 1
+
+            # avança para a fatia seguinte; os prazos de voltas futuras ficam no balde
+            self.cursor += 1
+            balde = self.baldes[self.cursor % len(self.baldes)]
+            ficam = []
+            for prazo, did in balde:
+                if did not in ativos:
+                    self.n -= 1
+                    self.descartados += 1
+                elif int(prazo // self.largura) <= self.cursor:
+                    heapq.heappush(self.corrente, (prazo, did))
+                else:
+                    ficam.append((prazo, did))
+            balde[:] = ficam
+        return None
+
+    def retira(self):
+        self.n -= 1
+        return heapq.heappop(self.corrente)
+
+# ---- Calcular fila média ------
+
+def calcula_fila_media_tempo(historico_fila, tempo_simulacao):
+    if len(historico_fila) < 2:
+        return 0
+
+    # área sob a curva em degraus: tamanho de cada troço vezes a sua duração
+    historico = np.asarray(historico_fila, dtype=float)
+    area = np.dot(historico[:-1, 1], np.diff(historico[:, 0]))
+
+    return float(area / tempo_simulacao)
+
+# ---- Ocupação dos médicos ----
+# Contadores de médicos ocupados (total e por especialidade principal)
+# atualizados em cada início/fim de consulta, em O(1) amortizado:
+#   - integral do número de ocupados no tempo, por especialidade, recortada ao
+#     horizonte da configuração;
+#   - linha temporal em baldes de largura fixa (15 min por omissão) com o tempo
+#     ocupado em cada balde; cada especialidade só avança quando o seu contador
+#     muda, por isso cada evento toca apenas nos baldes que atravessou;
+#   - pausas de cada médico (intervalos livres dentro do horizonte): número,
+#     média e máximo.
+# Médicos que entram ou saem a meio (bifurcações, ver zenith.instantaneos) só
+# contam na capacidade da especialidade enquanto estão ao serviço.
+
+LARGURA_BALDE_OCUPACAO = 15.0   # minutos
+
+class Ocupacao:
+    def __init__(self, medicos, tempo_simulacao, largura_balde=LARGURA_BALDE_OCUPACAO):
+        self.tempo_simulacao = tempo_simulacao
+        self.largura_balde = largura_balde
+        self.num_baldes = max(1, math.ceil(tempo_simulacao / largura_balde))
+        self.ocupados = 0
+
+        self.especialidades = list(dict.fromkeys(m.especialidade for m in medicos))
+        self.medicos_especialidade = {esp: 0 for esp in self.especialidades}
+        for m in medicos:
+            self.medicos_especialidade[m.especialidade] += 1
+        self.ocupados_especialidade = {esp: 0 for esp in self.especialidades}
+        self.ultimo = {esp: 0.0 for esp in self.especialidades}
+        self.area = {esp: 0.0 for esp in self.especialidades}
+        self.baldes = {esp: [0.0] * self.num_baldes for esp in self.especialidades}
+
+        self.livre_desde = {m.id: 0.0 for m in medicos}
+        self.pausas = {m.id: [0, 0.0, 0.0] for m in medicos}   # número, soma, máximo
+
+        self.mudancas = {esp: [] for esp in self.especialidades}   # (t, +1/-1) na capacidade
+        self.servico = {}       # médico -> [entrada, saída], só se não for todo o horizonte
+        self.a_sair = set()     # médicos que saem quando acabarem a consulta
+
+    # soma n × duração de [t0, t1) aos baldes que o intervalo atravessa
+    def _reparte(self, baldes, t0, t1, n):
+        largura = self.largura_balde
+        b = int(t0 / largura)
+        while t0 < t1:
+            fim = min(t1, (b + 1) * largura)
+            baldes[min(b, self.num_baldes - 1)] += n * (fim - t0)
+            t0 = fim
+            b += 1
+
+    # acumula ocupados × duração desde a última alteração da especialidade até t
+    def _avanca(self, esp, t):
+        t0 = self.ultimo[esp]
+        t1 = min(t, self.tempo_simulacao)
+        n = self.ocupados_especialidade[esp]
+        if t1 > t0:
+            self.ultimo[esp] = t1
+            if n:
+                self.area[esp] += n * (t1 - t0)
+                self._reparte(self.baldes[esp], t0, t1, n)
+
+    def _duracao_pausa(self, medico_id, t):
+        return min(t, self.tempo_simulacao) - min(self.livre_desde[medico_id], self.tempo_simulacao)
+
+    def _pausa(self, medico_id, t):
+        duracao = self._duracao_pausa(medico_id, t)
+        if duracao > 0:
+            pausa = self.pausas[medico_id]
+            pausa[0] += 1
+            pausa[1] += duracao
+            if duracao > pausa[2]:
+                pausa[2] = duracao
+
+    # médico que entra ao serviço em t (conta na capacidade da especialidade a
+    # partir de t e o tempo antes de t não é pausa)
+    def adiciona_medico(self, medico, t):
+        esp = medico.especialidade
+        if esp not in self.medicos_especialidade:
+            self.especialidades.append(esp)
+            self.medicos_especialidade[esp] = 0
+            self.ocupados_especialidade[esp] = 0
+            self.ultimo[esp] = 0.0
+            self.area[esp] = 0.0
+            self.baldes[esp] = [0.0] * self.num_baldes
+            self.mudancas[esp] = []
+        self.medicos_especialidade[esp] += 1
+        self.mudancas[esp].append((t, 1))
+        self.servico[medico.id] = [t, math.inf]
+        self.livre_desde[medico.id] = t
+        self.pausas[medico.id] = [0, 0.0, 0.0]
+
+    # médico que sai em t; se estiver em consulta sai quando a acabar
+    def remove_medico(self, medico, t):
+        if medico.id in self.a_sair or self.servico.get(medico.id, (0.0, math.inf))[1] != math.inf:
+            return      # já saiu ou vai sair
+        if medico.ocupado:
+            self.a_sair.add(medico.id)
+        else:
+            self._sai(medico, t)
+
+    def _sai(self, medico, t):
+        self._pausa(medico.id, t)
+        self.medicos_especialidade[medico.especialidade] -= 1
+        self.mudancas[medico.especialidade].append((t, -1))
+        self.servico.setdefault(medico.id, [0.0, math.inf])[1] = t
+
+    # junta os contadores de outra Ocupacao com médicos de outras especialidades
+    # (simulação decomposta por especialidade, ver zenith.decomposicao); copia as
+    # listas, para que a outra possa voltar a ser junta ou resumida
+    def junta(self, outra):
+        self.ocupados += outra.ocupados
+        for esp in outra.especialidades:
+            if esp not in self.medicos_especialidade:
+                self.especialidades.append(esp)
+            self.medicos_especialidade[esp] = outra.medicos_especialidade[esp]
+            self.ocupados_especialidade[esp] = outra.ocupados_especialidade[esp]
+            self.ultimo[esp] = outra.ultimo[esp]
+            self.area[esp] = outra.area[esp]
+            self.baldes[esp] = list(outra.baldes[esp])
+            self.mudancas[esp] = list(outra.mudancas[esp])
+        self.servico.update({medico_id: list(periodo) for medico_id, periodo in outra.servico.items()})
+        self.a_sair |= outra.a_sair
+        self.livre_desde.update(outra.livre_desde)
+        self.pausas.update({medico_id: list(pausa) for medico_id, pausa in outra.pausas.items()})
+
+    def inicio(self, medico, t):
+        self._avanca(medico.especialidade, t)
+        self.ocupados_especialidade[medico.especialidade] += 1
+        self.ocupados += 1
+        self._pausa(medico.id, t)
+
+    def fim(self, medico, t):
+        self._avanca(medico.especialidade, t)
+        self.ocupados_especialidade[medico.especialidade] -= 1
+        self.ocupados -= 1
+        self.livre_desde[medico.id] = t
+        if medico.id in self.a_sair:
+            self.a_sair.discard(medico.id)
+            self._sai(medico, t)
+
+    # médicos × minutos disponíveis na especialidade, no horizonte e em cada balde
+    def _capacidade(self, esp):
+        if not self.mudancas[esp]:
+            n = self.medicos_especialidade[esp]
+            return n * self.tempo_simulacao, [
+                n * min(self.largura_balde, self.tempo_simulacao - b * self.largura_balde)
+                for b in range(self.num_baldes)
+            ]
+
+        mudancas = sorted(self.mudancas[esp])
+        n = self.medicos_especialidade[esp] - sum(d for _, d in mudancas)    # em t = 0
+        total = 0.0
+        baldes = [0.0] * self.num_baldes
+        t0 = 0.0
+        for t, d in mudancas + [(self.tempo_simulacao, 0)]:
+            t = min(max(t, t0), self.tempo_simulacao)
+            if n and t > t0:
+                total += n * (t - t0)
+                self._reparte(baldes, t0, t, n)
+            t0 = t
+            n += d
+        return total, baldes
+
+    # fecha as contas no fim do horizonte sem alterar os contadores: pode ser
+    # chamado várias vezes (e a simulação continuar depois) com o mesmo resultado
+    def resumo(self, medicos):
+        area = dict(self.area)
+        baldes = {esp: list(b) for esp, b in self.baldes.items()}
+        for esp in self.especialidades:
+            t0 = self.ultimo[esp]
+            n = self.ocupados_especialidade[esp]
+            if n and self.tempo_simulacao > t0:
+                area[esp] += n * (self.tempo_simulacao - t0)
+                self._reparte(baldes[esp], t0, self.tempo_simulacao, n)
+
+        por_medico = {}
+        for m in medicos:
+            n, soma, maximo = self.pausas[m.id]
+            entrada, saida = self.servico.get(m.id, (0.0, math.inf))
+            # a pausa em curso no fim do horizonte
+            duracao = 0 if m.ocupado or saida != math.inf else self._duracao_pausa(m.id, self.tempo_simulacao)
+            if duracao > 0:
+                n, soma, maximo = n + 1, soma + duracao, max(maximo, duracao)
+            disponivel = min(saida, self.tempo_simulacao) - min(entrada, self.tempo_simulacao)
+            por_medico[m.id] = {
+                "especialidade": m.especialidade,
+                "tempo_ocupado": m.total_tempo_ocupado,
+                "utilizacao": m.total_tempo_ocupado / disponivel if disponivel > 0 else 0,
+                "pausas": n,
+                "pausa_media": soma / n if n else 0,
+                "pausa_max": maximo,
+            }
+
+        por_especialidade = {}
+        linha_temporal = {}
+        for esp in self.especialidades:
+            capacidade, capacidade_baldes = self._capacidade(esp)
+            por_especialidade[esp] = {
+                "medicos": self.medicos_especialidade[esp],
+                "tempo_ocupado": area[esp],
+                "utilizacao": area[esp] / capacidade if capacidade else 0,
+            }
+            # fração ocupada dos médicos da especialidade em cada balde
+            linha_temporal[esp] = [
+                ocupado / disponivel if disponivel else 0
+                for ocupado, disponivel in zip(baldes[esp], capacidade_baldes)
+            ]
+
+        return {
+            "largura_balde": self.largura_balde,
+            "por_medico": por_medico,
+            "por_especialidade": por_especialidade,
+            "linha_temporal": linha_temporal,
+        }
+
+
+# ---- Instrumentação do motor ----
+# Contadores por tipo de evento, tempos de cada handler (histograma em potências
+# de 2 microssegundos) e máximos atingidos pela lista de eventos e pela fila.
+# Só é criada quando simula(instrumentar=True); caso contrário o ciclo de
+# eventos apenas testa um booleano.
+
+NUM_BALDES_HISTOGRAMA = 24
+
+class Instrumentacao:
+    def __init__(self):
+        self.contagem = {tipo: 0 for tipo in NOMES_EVENTOS}
+        self.tempo_total = {tipo: 0.0 for tipo in NOMES_EVENTOS}
+        self.histograma = {tipo: [0] * NUM_BALDES_HISTOGRAMA for tipo in self.contagem}
+        self.desistencias_obsoletas = 0   # prazos de desistência de doentes que já não estavam na fila
+        self.max_eventos = 0
+        self.max_fila = 0
+
+    def regista(self, tipo, duracao, tam_eventos, tam_fila):
+        self.contagem[tipo] += 1
+        self.tempo_total[tipo] += duracao
+        balde = min(int(duracao * 1e6).bit_length(), NUM_BALDES_HISTOGRAMA - 1)
+        self.histograma[tipo][balde] += 1
+        if tam_eventos > self.max_eventos:
+            self.max_eventos = tam_eventos
+        if tam_fila > self.max_fila:
+            self.max_fila = tam_fila
+
+    def resumo(self):
+        por_tipo = {}
+        for tipo, n in self.contagem.items():
+            histograma = {}
+            for balde, contagem in enumerate(self.histograma[tipo]):
+                if contagem:
+                    histograma[f"<{2 ** balde}us"] = contagem
+            por_tipo[NOMES_EVENTOS[tipo]] = {
+                "eventos": n,
+                "tempo_total_ms": self.tempo_total[tipo] * 1000,
+                "tempo_medio_us": (self.tempo_total[tipo] / n * 1e6) if n else 0,
+                "histograma": histograma,
+            }
+        return {
+            "por_tipo": por_tipo,
+            "desistencias_obsoletas": self.desistencias_obsoletas,
+            "max_lista_eventos": self.max_eventos,
+            "max_fila": self.max_fila,
+        }
+
+
+# -------- ESTADO DE UMA EXECUÇÃO ---------------------------
+# Tudo o que o ciclo de eventos precisa para continuar fica num dicionário:
+# relógio, lista de eventos, fila, prazos, médicos, geradores aleatórios e
+# acumuladores. Assim uma execução pode parar a meio (avanca(estado, ate=t)),
+# ser gravada e retomada, ou bifurcada com outros parâmetros (ver zenith.instantaneos).
+# config["ANTITETICO"]: gera intervalos entre chegadas e durações das consultas
+# com as uniformes espelhadas (par antitético da mesma semente)
+
+def estado_inicial(config=None, semente=None):
+    cfg = prepara_config(config)
+    if cfg["COMPETENCIAS_MEDICOS"]:
+        cfg["NUM_MEDICOS"] = len(cfg["COMPETENCIAS_MEDICOS"])
+
+    aleatorio, rng_chegadas, rng_consultas, rng_paciencia = geradores(semente)
+
+    pessoas_disponiveis = pessoas.copy()
+    aleatorio.shuffle(pessoas_disponiveis)
+
+    medicos = cria_medicos(cfg, aleatorio)
+
+    estado = estado_vazio(cfg, semente, medicos, aleatorio, rng_chegadas, rng_consultas, rng_paciencia)
+    estado["pessoas_disponiveis"] = pessoas_disponiveis
+    gera_chegadas(estado, 0.0)
+    return estado
+
+# com semente, chegadas e consultas têm fluxos aleatórios separados, para
+# que o par antitético use a mesma uniforme em cada intervalo e em cada consulta
+def geradores(semente):
+    if semente is None:
+        return random, np.random, np.random, np.random
+
+    aleatorio = random.Random(semente)
+    fluxo_chegadas, fluxo_consultas, fluxo_paciencia = np.random.SeedSequence(semente).spawn(3)
+    rng_chegadas = np.random.RandomState(np.random.MT19937(fluxo_chegadas))
+    rng_consultas = np.random.RandomState(np.random.MT19937(fluxo_consultas))
+    rng_paciencia = np.random.RandomState(np.random.MT19937(fluxo_paciencia))
+    return aleatorio, rng_chegadas, rng_consultas, rng_paciencia
+
+def cria_medicos(cfg, aleatorio):
+    especialidades = cfg["ESPECIALIDADES"]
+    num_medicos = cfg["NUM_MEDICOS"]
+    medicos = []
+    bits = bits_especialidades(especialidades)
+
+    if cfg["COMPETENCIAS_MEDICOS"]:
+        # médicos com as competências indicadas (a primeira é a principal)
+        for i, competencias in enumerate(cfg["COMPETENCIAS_MEDICOS"]):
+            medicos.append(Medico(f"m{i}", competencias[0], list(competencias), mascara_especialidades(competencias, bits)))
+    else:
+        especialidades_medicos = []
+
+        # garante pelo menos um médico por especialidade
+        if num_medicos >= len(especialidades):
+            especialidades_medicos.extend(especialidades)
+
+        # preenche os restantes aleatoriamente
+        while len(especialidades_medicos) < num_medicos:
+            especialidades_medicos.append(aleatorio.choice(especialidades))
+
+        aleatorio.shuffle(especialidades_medicos)
+
+        # cria os médicos
+        for i, esp in enumerate(especialidades_medicos):
+            medicos.append(Medico(f"m{i}", esp, mascara=bits[esp]))
+
+    return medicos
+
+# estado no instante 0 sem chegadas agendadas (também usado pelas simulações
+# decompostas por especialidade, ver zenith.decomposicao)
+def estado_vazio(cfg, semente, medicos, aleatorio, rng_chegadas, rng_consultas, rng_paciencia):
+    return {
+        "cfg": cfg,
+        "semente": semente,
+        "tempo_atual": 0.0,
+        "aleatorio": aleatorio,
+        "rng_chegadas": rng_chegadas,
+        "rng_consultas": rng_consultas,
+        "rng_paciencia": rng_paciencia,
+        "eventos": cria_lista_eventos(cfg["LISTA_EVENTOS"]), # Lista de eventos que vão acontecer, ordenada por tempo de ocorrência do evento
+        "prazos": RodaTemporal() if cfg["PACIENCIA_ALEATORIA"] else FilasPrazos(),
+        "fila": FilaEspera(cfg["ESPECIALIDADES"], cfg["POLITICA_DESPACHO"]),
+        "medicos": medicos,
+        "medico_do_doente": {},
+        "pessoas_disponiveis": [],
+        "chegadas": {},
+        "servicos": {},     # durações de consulta já conhecidas (registos reais, ver zenith.chegadas)
+        "tempos_chegada": {},
+        "tempos_inicio_consulta": {},
+        "tempos_espera": {},
+        "tempos_sistema": {},
+        "historico_fila": [],
+        "historico_doentes_fila": [],
+        "historico_fila_detalhado": [],
+        "historico_desistencias": [],
+        "historico_ocupacao": [],
+        "estado_doentes": {},
+        "tempos_espera_prioridade": {"vermelho": [], "amarelo": [], "verde": []},
+        "doentes_atendidos": 0,
+        "desistencias": 0,
+        "soma_consultas": 0.0,
+        "num_consultas": 0,
+        "num_eventos": 0,
+        "ocupacao": Ocupacao(medicos, cfg["TEMPO_SIMULACAO"]),
+    }
+
+# --- Geração das chegadas de doentes, de "desde" até ao horizonte
+
+def gera_chegadas(estado, desde):
+    cfg = estado["cfg"]
+    taxa_chegada = cfg["TAXA_CHEGADA"]
+    tempo_simulacao = cfg["TEMPO_SIMULACAO"]
+    especialidades = cfg["ESPECIALIDADES"]
+    cores = list(cfg["PESOS_PRIORIDADE"])
+    pesos_cores = list(cfg["PESOS_PRIORIDADE"].values())
+    antitetico = cfg.get("ANTITETICO", False)
+    aleatorio = estado["aleatorio"]
+    rng_chegadas = estado["rng_chegadas"]
+    pessoas_disponiveis = estado["pessoas_disponiveis"]
+    chegadas = estado["chegadas"]
+    tempos_chegada = estado["tempos_chegada"]
+    queueEventos = estado["eventos"]
+
+    triagem = Triagem(especialidades, cfg["PESOS_PRIORIDADE"]) if cfg["TRIAGEM_DEMOGRAFICA"] else None
+    tempo_atual = desde + gera_intervalo_tempo_chegada(taxa_chegada, rng_chegadas, antitetico)
+    while tempo_atual < tempo_simulacao and pessoas_disponiveis:
+
+        pessoa = pessoas_disponiveis.pop()
+
+        id_doente = pessoa["id"]
+        nome_doente = pessoa["nome"]
+        if triagem:
+            esp, cor = triagem.sorteia(pessoa, aleatorio.random())
+        else:
+            esp = aleatorio.choice(especialidades)
+            cor = aleatorio.choices(cores, weights=pesos_cores)[0]
+        doente = Doente(id_doente, nome_doente, esp, cor)
+
+        chegadas[doente.id] = doente
+        tempos_chegada[doente.id] = tempo_atual
+        queueEventos.agenda(tempo_atual, CHEGADA, doente.id)
+        tempo_atual += gera_intervalo_tempo_chegada(taxa_chegada, rng_chegadas, antitetico)
+
+
+# --- Tratamento dos eventos
+# Processa os eventos anteriores a "ate" (todos, por omissão). Os eventos no
+# instante "ate" ficam por tratar, para que uma bifurcação nesse instante
+# aconteça antes deles.
+
+def avanca(estado, ate=math.inf, verboso=False, instr=None, gravador=None):
+    cfg = estado["cfg"]
+    tempo_simulacao = cfg["TEMPO_SIMULACAO"]
+    tempo_max_espera = cfg["TEMPO_MAX_ESPERA"]
+    distribuicao = cfg["DISTRIBUICAO_TEMPO_CONSULTA"]
+    tempo_medio_consulta = cfg["TEMPO_MEDIO_CONSULTA"]
+    antitetico = cfg.get("ANTITETICO", False)
+    paciencia_aleatoria = cfg["PACIENCIA_ALEATORIA"]
+    rng_consultas = estado["rng_consultas"]
+    rng_paciencia = estado["rng_paciencia"]
+    servicos = estado.get("servicos", {})
+
+    queueEventos = estado["eventos"]
+    prazos = estado["prazos"]
+    queue = estado["fila"]
+    medicos = estado["medicos"]
+    medico_do_doente = estado["medico_do_doente"]
+    bits = queue.bits
+    ocupacao = estado["ocupacao"]
+    chegadas = estado["chegadas"]
+    tempos_chegada = estado["tempos_chegada"]
+    tempos_inicio_consulta = estado["tempos_inicio_consulta"]
+    tempos_espera = estado["tempos_espera"]
+    tempos_sistema = estado["tempos_sistema"]
+    historico_fila = estado["historico_fila"]
+    historico_doentes_fila = estado["historico_doentes_fila"]
+    historico_fila_detalhado = estado["historico_fila_detalhado"]
+    historico_desistencias = estado["historico_desistencias"]
+    historico_ocupacao = estado["historico_ocupacao"]
+    estado_doentes = estado["estado_doentes"]
+    tempos_espera_prioridade = estado["tempos_espera_prioridade"]
+
+    doentes_atendidos = estado["doentes_atendidos"]
+    desistencias = estado["desistencias"]
+    soma_consultas = estado["soma_consultas"]
+    num_consultas = estado["num_consultas"]
+    num_eventos = estado["num_eventos"]
+    tempo_atual = estado["tempo_atual"]
+
+    if gravador:
+        from zenith.traco import T_CHEGADA, T_INICIO, T_SAIDA, T_DESISTENCIA
+
+    while queueEventos or prazos:
+        if instr:
+            inicio_evento = time.perf_counter()
+
+        # o próximo prazo de desistência passa à frente do próximo evento se for
+        # anterior (no mesmo instante fica depois das chegadas e antes das saídas)
+        prazo = prazos.proximo(queue) if prazos else None
+        if prazo is not None and (
+            not queueEventos
+            or (prazo[0], DESISTENCIA) < queueEventos.primeiro()[:2]
+        ):
+            if prazo[0] >= ate:
+                break
+            prazos.retira()
+            evento = (prazo[0], DESISTENCIA, -1, prazo[1])
+        elif queueEventos:
+            if queueEventos.primeiro()[0] >= ate:
+                break
+            evento = queueEventos.retira()
+        else:
+            break   # só restavam prazos de doentes que já saíram da fila
+
+        num_eventos += 1
+        tipo = e_tipo(evento)
+        id_doente = e_doente(evento)
+        tempo_atual = e_tempo(evento)
+        historico_fila.append((tempo_atual, len(queue)))
+
+        if tipo == CHEGADA:
+
+            doente=chegadas[id_doente]
+
+            estado_doentes[id_doente] = {
+                "nome": doente.nome,
+                "especialidade": doente.especialidade,
+                "prioridade": doente.prioridade,
+                "chegada": tempo_atual,
+                "inicio": None,
+                "saida": None,
+                "estado": "Em espera"
+            }
+
+            if verboso:
+                print(
+                    f"CHEGADA | {doente.nome} ({doente.id}) | "
+                    f"Especialidade: {doente.especialidade} | "
+                    f"Prioridade: {doente.prioridade} | "
+                    f"Tempo: {tempo_atual:.2f}"
+                )
+
+            medico = procuraMedicoEspecialidade(medicos, bits[doente.especialidade])
+
+            if medico is not None: #se sim
+                medico.iniciar_consulta(doente.id,tempo_atual) #inicia se a consulta
+                medico_do_doente[doente.id] = medico
+                ocupacao.inicio(medico, tempo_atual)
+                if gravador:
+                    gravador.regista(tempo_atual, T_CHEGADA, doente.id, fila=len(queue))
+                    gravador.regista(tempo_atual, T_INICIO, doente.id, medico, len(queue))
+                historico_ocupacao.append((tempo_atual, ocupacao.ocupados))
+                tempos_inicio_consulta[doente.id] = tempo_atual
+                tempo_consulta = servicos.pop(doente.id, None)
+                if tempo_consulta is None:
+                    tempo_consulta = gera_tempo_consulta(distribuicao, tempo_medio_consulta, rng_consultas, antitetico)
+                soma_consultas += tempo_consulta
+                num_consultas += 1
+                estado_doentes[id_doente]["inicio"] = tempo_atual
+                estado_doentes[id_doente]["estado"] = "Em consulta"
+
+                tempos_espera[doente.id] = ( tempos_inicio_consulta[doente.id] - tempos_chegada[doente.id])
+                tempos_espera_prioridade[doente.prioridade].append(tempo_atual - tempos_chegada[doente.id])
+
+                queueEventos.agenda(tempo_atual + tempo_consulta, SAIDA, doente.id) #agenda-se evento de saída
+
+            else:
+                queue.entra(PRIORIDADES[doente.prioridade], tempo_atual, doente.id, doente.especialidade)
+                historico_doentes_fila.append((tempo_atual, doente.id, doente.nome, doente.especialidade, doente.prioridade))
+                if doente.prioridade != "vermelho":
+                    paciencia = tempo_max_espera[doente.prioridade]
+                    if paciencia_aleatoria:
+                        paciencia = rng_paciencia.exponential(paciencia)
+                    prazos.agenda(tempo_atual + paciencia, doente.id, doente.prioridade)
+
+                historico_fila.append((tempo_atual, len(queue)))
+                fila_ids = queue.ids()
+                historico_fila_detalhado.append((tempo_atual,fila_ids))
+                if gravador:
+                    gravador.regista(tempo_atual, T_CHEGADA, doente.id, fila=len(queue))
+
+                if verboso:
+                    print(f"Fila de Espera({len(queue)}): ", queue.entradas())
+
+
+        elif tipo == DESISTENCIA:
+
+            # verificar se o doente ainda está na fila
+            if id_doente in queue:
+                doente = chegadas[id_doente]
+                tempo_espera = tempo_atual - tempos_chegada[id_doente]
+                tempos_espera_prioridade[doente.prioridade].append(tempo_espera)
+
+                if verboso:
+                    print(
+                    f"DESISTÊNCIA | {doente.nome} ({doente.id}) | "
+                    f"Especialidade: {doente.especialidade} | "
+                    f"Prioridade: {doente.prioridade} | "
+                    f"Tempo: {tempo_atual:.2f}"
+                )
+
+                queue.sai(id_doente)
+                desistencias += 1
+                historico_desistencias.append((tempo_atual, desistencias))
+                historico_fila.append((tempo_atual, len(queue)))
+                fila_ids = queue.ids()
+                estado_doentes[id_doente]["estado"] = "Desistiu"
+                estado_doentes[id_doente]["saida"] = tempo_atual
+                historico_fila_detalhado.append((tempo_atual,fila_ids))
+                if gravador:
+                    gravador.regista(tempo_atual, T_DESISTENCIA, id_doente, fila=len(queue))
+
+        elif tipo == SAIDA or tipo == ENTRADA:
+
+            if tipo == SAIDA:
+                doente = chegadas[id_doente]
+
+                if verboso:
+                    print(
+                        f"SAÍDA | {doente.nome} ({doente.id}) | "
+                        f"Especialidade: {doente.especialidade} | "
+                        f"Prioridade: {doente.prioridade} | "
+                        f"Tempo: {tempo_atual:.2f}"
+                    )
+
+                tempos_sistema[id_doente] = (tempo_atual - tempos_chegada[id_doente])
+                estado_doentes[id_doente]["saida"] = tempo_atual
+                estado_doentes[id_doente]["estado"] = "Atendido"  # Vamos libertar o médico e despachar o doente
+
+
+                doentes_atendidos += 1
+                medico = medico_do_doente.pop(id_doente) # medico que atendeu o doente
+
+                medico.terminar_consulta(tempo_atual, tempo_simulacao)
+                ocupacao.fim(medico, tempo_atual)
+                historico_ocupacao.append((tempo_atual, ocupacao.ocupados))
+                if gravador:
+                    gravador.regista(tempo_atual, T_SAIDA, id_doente, medico, len(queue))
+
+            else:
+                # médico que entra ao serviço a meio (bifurcações, ver zenith.instantaneos);
+                # nestes eventos o "doente" é o índice do médico na lista
+                medico = medicos[id_doente]
+                if verboso:
+                    print(f"ENTRADA | Médico {medico.id} ({medico.especialidade}) | Tempo: {tempo_atual:.2f}")
+
+            if len(queue) > 0: # se há doentes à espera vou ocupar o médico que ficou livre...
+
+                resultado = queue.escolhe(medico)
+
+                if resultado: # doente já saiu da fila
+                    historico_fila.append((tempo_atual, len(queue)))
+                    fila_ids = queue.ids()
+                    historico_fila_detalhado.append((tempo_atual,fila_ids))
+                    prio, t_chegada, did = resultado
+                    medico.iniciar_consulta(did, tempo_atual)
+                    medico_do_doente[did] = medico
+                    ocupacao.inicio(medico, tempo_atual)
+                    historico_ocupacao.append((tempo_atual, ocupacao.ocupados))
+                    if gravador:
+                        gravador.regista(tempo_atual, T_INICIO, did, medico, len(queue))
+                    estado_doentes[did]["inicio"] = tempo_atual
+                    estado_doentes[did]["estado"] = "Em consulta"
+
+                    tempo_espera = tempo_atual - tempos_chegada[did]
+                    tempos_espera[did] = tempo_espera
+                    novo_doente = chegadas[did]
+                    tempos_espera_prioridade[novo_doente.prioridade].append(tempo_espera)
+
+                    tempos_inicio_consulta[did] = tempo_atual
+                    tempos_espera[did] = tempo_atual - tempos_chegada[did]
+
+                    tempo_consulta = servicos.pop(did, None)
+                    if tempo_consulta is None:
+                        tempo_consulta = gera_tempo_consulta(distribuicao, tempo_medio_consulta, rng_consultas, antitetico)
+                    soma_consultas += tempo_consulta
+                    num_consultas += 1
+                    queueEventos.agenda(tempo_atual + tempo_consulta, SAIDA, did)
+
+        if instr:
+            instr.regista(tipo, time.perf_counter() - inicio_evento, len(queueEventos), len(queue))
+
+    if ate < math.inf:
+        tempo_atual = max(tempo_atual, ate)
+
+    estado["doentes_atendidos"] = doentes_atendidos
+    estado["desistencias"] = desistencias
+    estado["soma_consultas"] = soma_consultas
+    estado["num_consultas"] = num_consultas
+    estado["num_eventos"] = num_eventos
+    estado["tempo_atual"] = tempo_atual
+    return estado
+
+
+# --- Resultados de uma execução terminada
+
+def resultados_estado(estado, verboso=False):
+    cfg = estado["cfg"]
+    tempo_simulacao = cfg["TEMPO_SIMULACAO"]
+    medicos = estado["medicos"]
+    tempos_espera = estado["tempos_espera"]
+    tempos_sistema = estado["tempos_sistema"]
+    historico_fila = estado["historico_fila"]
+    doentes_atendidos = estado["doentes_atendidos"]
+    desistencias = estado["desistencias"]
+    num_consultas = estado["num_consultas"]
+
+    media_espera = (sum(tempos_espera.values()) / len(tempos_espera) if tempos_espera else 0)
+    media_sistema = (sum(tempos_sistema.values()) / len(tempos_sistema) if tempos_sistema else 0)
+
+    if historico_fila:
+        tamanhos = [tam for _, tam in historico_fila]
+        fila_media = calcula_fila_media_tempo(historico_fila, tempo_simulacao)
+        fila_max = max(tamanhos)
+    else:
+        fila_media= 0
+        fila_max= 0
+
+    if verboso:
+        print(f"Doentes atendidos: {doentes_atendidos}")
+        print(f"Doentes que desistiram: {desistencias}")
+
+        print("\nOcupação dos médicos:")
+
+        for m in medicos:
+            percentagem = (m.total_tempo_ocupado / tempo_simulacao) * 100
+            print(f"Médico {m.id} ({m.especialidade}): {percentagem:.1f}%")
+
+        print(f"Tempo médio de espera: {media_espera:.2f} minutos") # .2f - mostra até duas casas decimais
+        print(f"Tempo médio na clínica: {media_sistema:.2f} minutos")
+        print(f"Tamanho médio da fila: {fila_media:.2f}")
+        print(f"Tamanho máximo da fila: {fila_max}")
+
+    return {
+    "fila_media": fila_media,
+    "fila_max": fila_max,
+    "media_espera": media_espera,
+    "media_sistema": media_sistema,
+    "doentes_atendidos": doentes_atendidos,
+    "desistencias": desistencias,
+    "num_eventos": estado["num_eventos"],
+    "semente": estado["semente"],
+    "taxa_chegada_realizada": len(estado["chegadas"]) / tempo_simulacao,
+    "media_tempo_consulta_realizada": estado["soma_consultas"] / num_consultas if num_consultas else 0,
+    "config": cfg,
+    "medicos": medicos,
+    "doentes": estado["chegadas"],
+    "historico_fila": historico_fila,
+    "historico_doentes_fila": estado["historico_doentes_fila"],
+    "historico_fila_detalhado": estado["historico_fila_detalhado"],
+    "historico_desistencias": estado["historico_desistencias"],
+    "tempos_espera_prioridade": estado["tempos_espera_prioridade"],
+    "historico_ocupacao": estado["historico_ocupacao"],
+    "ocupacao": estado["ocupacao"].resumo(medicos),
+    "estado_doentes": estado["estado_doentes"]
+}
+
+
+# -------- FUNÇÃO PRINCIPAL ---------------------------------
+# config: alterações aos parâmetros globais (ver config_atual)
+# semente: torna a execução reprodutível sem mexer no estado aleatório global
+# verboso: escreve cada evento no terminal
+# instrumentar: acrescenta "instrumentacao" aos resultados (ver Instrumentacao)
+# traco: caminho de um ficheiro onde gravar todos os acontecimentos (ver zenith.traco)
+
+def simula(config=None, semente=None, verboso=True, instrumentar=False, traco=None):
+    estado = estado_inicial(config, semente)
+
+    instr = Instrumentacao() if instrumentar else None
+    if instr:
+        instr.max_eventos = len(estado["eventos"])
+
+    gravador = None
+    if traco:
+        from zenith.traco import GravadorTraco
+        gravador = GravadorTraco(traco, estado["medicos"])
+
+    avanca(estado, verboso=verboso, instr=instr, gravador=gravador)
+    resultados = resultados_estado(estado, verboso)
+
+    if gravador:
+        gravador.fecha(resultados["config"], semente, resultados["doentes"], resultados["medicos"])
+    if instr:
+        instr.desistencias_obsoletas = estado["prazos"].descartados
+        resultados["instrumentacao"] = instr.resumo()
+
+    return resultados
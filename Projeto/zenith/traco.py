@@ -0,0 +1,277 @@
+# Traço binário de uma execução e reconstrução dos resultados a partir dele
+#
+# simula(traco="ficheiro.ztr") grava cada acontecimento como um registo de
+# tamanho fixo (tempo, tipo, índice do doente, índice do médico, tamanho da
+# fila depois do acontecimento), em blocos de um array NumPy estruturado.
+# No fim do ficheiro fica um rodapé JSON com a configuração, os doentes e os
+# médicos, seguido do tamanho desse rodapé (8 bytes).
+#
+# reconstroi() lê os registos de uma só vez e volta a calcular historico_fila,
+# historico_ocupacao, historico_desistencias, estado_doentes, etc., com
+# operações vetoriais, devolvendo um dicionário igual ao de simula(). Assim
+# qualquer grafico_* pode ser refeito sem voltar a simular:
+#
+#   python -m zenith.traco execucao.ztr              -> resumo
+#   python -m zenith.traco execucao.ztr --graficos   -> todos os gráficos
+
+import argparse
+import json
+import os
+import struct
+
+import numpy as np
+
+from zenith.simulacao import Doente, Medico, Ocupacao, calcula_fila_media_tempo
+
+ASSINATURA = b"ZTRACO1\n"
+
+REGISTO = np.dtype([
+    ("tempo", "<f8"),
+    ("tipo", "u1"),
+    ("doente", "<i4"),
+    ("medico", "<i2"),
+    ("fila", "<i4"),
+])
+
+# tipos de registo
+T_CHEGADA = 0
+T_INICIO = 1       # início de consulta (à chegada ou vindo da fila)
+T_SAIDA = 2
+T_DESISTENCIA = 3
+
+TAMANHO_BLOCO = 65536
+
+
+class GravadorTraco:
+    def __init__(self, caminho, medicos, tamanho_bloco=TAMANHO_BLOCO):
+        self.caminho = caminho
+        self.ficheiro = open(caminho, "wb")
+        self.ficheiro.write(ASSINATURA)
+        self.bloco = np.empty(tamanho_bloco, dtype=REGISTO)
+        self.n = 0
+        self.total = 0
+        self.indices_doentes = {}
+        self.indices_medicos = {m.id: i for i, m in enumerate(medicos)}
+
+    # os doentes são numerados pela ordem da primeira chegada
+    def _indice_doente(self, did):
+        indice = self.indices_doentes.get(did)
+        if indice is None:
+            indice = self.indices_doentes[did] = len(self.indices_doentes)
+        return indice
+
+    def regista(self, tempo, tipo, did, medico=None, fila=0):
+        m = self.indices_medicos[medico.id] if medico is not None else -1
+        self.bloco[self.n] = (tempo, tipo, self._indice_doente(did), m, fila)
+        self.n += 1
+        if self.n == len(self.bloco):
+            self._despeja()
+
+    def _despeja(self):
+        self.bloco[:self.n].tofile(self.ficheiro)
+        self.total += self.n
+        self.n = 0
+
+    def fecha(self, cfg, semente, doentes, medicos):
+        self._despeja()
+        ordem = sorted(self.indices_doentes, key=self.indices_doentes.get)
+        rodape = json.dumps({
+            "config": cfg,
+            "semente": semente,
+            "registos": self.total,
+            "doentes": [[did, doentes[did].nome, doentes[did].especialidade, doentes[did].prioridade] for did in ordem],
+            "medicos": [[m.id, m.especialidade, m.especialidades] for m in medicos],
+        }, ensure_ascii=False).encode("utf-8")
+        self.ficheiro.write(rodape)
+        self.ficheiro.write(struct.pack("<Q", len(rodape)))
+        self.ficheiro.close()
+
+
+def le_traco(caminho):
+    tamanho = os.path.getsize(caminho)
+    with open(caminho, "rb") as f:
+        if f.read(len(ASSINATURA)) != ASSINATURA:
+            raise ValueError(f"{caminho} não é um traço ZenithSaúde")
+        f.seek(tamanho - 8)
+        tamanho_rodape = struct.unpack("<Q", f.read(8))[0]
+        f.seek(tamanho - 8 - tamanho_rodape)
+        meta = json.loads(f.read(tamanho_rodape).decode("utf-8"))
+
+    registos = np.fromfile(caminho, dtype=REGISTO, count=meta["registos"], offset=len(ASSINATURA))
+    return registos, meta
+
+
+# --- Reconstrução dos resultados
+
+def reconstroi(caminho):
+    registos, meta = le_traco(caminho)
+    cfg = meta["config"]
+    tempo_simulacao = cfg["TEMPO_SIMULACAO"]
+
+    tempo = registos["tempo"]
+    tipo = registos["tipo"]
+    doente = registos["doente"]
+    medico = registos["medico"]
+    fila = registos["fila"]
+    n = len(registos)
+
+    doentes = {}
+    for did, nome, esp, prio in meta["doentes"]:
+        doentes[did] = Doente(did, nome, esp, prio)
+    ids = [d[0] for d in meta["doentes"]]
+    especialidades = np.array([d[2] for d in meta["doentes"]], dtype=object)
+    prioridades = np.array([d[3] for d in meta["doentes"]], dtype=object)
+
+    chegada = tipo == T_CHEGADA
+    inicio = tipo == T_INICIO
+    saida = tipo == T_SAIDA
+    desistencia = tipo == T_DESISTENCIA
+
+    # historico_fila: cada acontecimento (chegada, saída, desistência) acrescenta
+    # o tamanho anterior; se a fila mudou, acrescenta também o novo tamanho
+    fila_anterior = np.concatenate(([0], fila[:-1])) if n else fila
+    evento = ~inicio
+    mudou = fila != fila_anterior
+    chaves = np.concatenate((2 * np.flatnonzero(evento), 2 * np.flatnonzero(mudou) + 1))
+    tempos_fila = np.concatenate((tempo[evento], tempo[mudou]))
+    tamanhos_fila = np.concatenate((fila_anterior[evento], fila[mudou]))
+    ordem = np.argsort(chaves, kind="stable")
+    historico_fila = list(zip(tempos_fila[ordem].tolist(), tamanhos_fila[ordem].tolist()))
+
+    # historico_ocupacao: +1 em cada início de consulta, -1 em cada saída
+    ocupa = inicio | saida
+    variacao = np.where(inicio, 1, -1)[ocupa]
+    historico_ocupacao = list(zip(tempo[ocupa].tolist(), np.cumsum(variacao).tolist()))
+
+    t_desist = tempo[desistencia]
+    historico_desistencias = list(zip(t_desist.tolist(), range(1, len(t_desist) + 1)))
+
+    # tempos por doente
+    num_doentes = len(ids)
+    t_chegada = np.full(num_doentes, np.nan)
+    t_inicio = np.full(num_doentes, np.nan)
+    t_saida = np.full(num_doentes, np.nan)
+    t_chegada[doente[chegada]] = tempo[chegada]
+    t_inicio[doente[inicio]] = tempo[inicio]
+    t_saida[doente[saida | desistencia]] = tempo[saida | desistencia]
+
+    # esperas pela ordem em que o motor as regista (início de consulta ou desistência)
+    espera = inicio | desistencia
+    esperas = tempo[espera] - t_chegada[doente[espera]]
+    prio_esperas = prioridades[doente[espera]]
+    tempos_espera_prioridade = {p: esperas[prio_esperas == p].tolist() for p in ("vermelho", "amarelo", "verde")}
+
+    esperas_consulta = tempo[inicio] - t_chegada[doente[inicio]]
+    sistema = tempo[saida] - t_chegada[doente[saida]]
+
+    # ocupação de cada médico: parte de cada consulta dentro do horizonte
+    ocupacao = np.bincount(
+        medico[saida],
+        weights=np.maximum(0.0, np.minimum(tempo[saida], tempo_simulacao) - np.minimum(t_inicio[doente[saida]], tempo_simulacao)),
+        minlength=len(meta["medicos"]),
+    )
+    medicos = []
+    for i, (mid, esp, esps) in enumerate(meta["medicos"]):
+        m = Medico(mid, esp, esps)
+        m.total_tempo_ocupado = float(ocupacao[i])
+        medicos.append(m)
+
+    # linhas temporais por especialidade e pausas: repete os inícios e fins de consulta
+    ocupacao_medicos = Ocupacao(medicos, tempo_simulacao)
+    for t, tp, m in zip(tempo[ocupa].tolist(), tipo[ocupa].tolist(), medico[ocupa].tolist()):
+        if tp == T_INICIO:
+            ocupacao_medicos.inicio(medicos[m], t)
+        else:
+            ocupacao_medicos.fim(medicos[m], t)
+
+    estado = np.full(num_doentes, "Em espera", dtype=object)
+    estado[~np.isnan(t_inicio)] = "Em consulta"
+    estado[doente[saida]] = "Atendido"
+    estado[doente[desistencia]] = "Desistiu"
+
+    def valor(x):
+        return None if np.isnan(x) else float(x)
+
+    estado_doentes = {}
+    for i, did in enumerate(ids):
+        estado_doentes[did] = {
+            "nome": doentes[did].nome,
+            "especialidade": especialidades[i],
+            "prioridade": prioridades[i],
+            "chegada": valor(t_chegada[i]),
+            "inicio": valor(t_inicio[i]),
+            "saida": valor(t_saida[i]),
+            "estado": estado[i],
+        }
+
+    # doentes que ficaram em fila e listas da fila em cada alteração
+    historico_doentes_fila = []
+    historico_fila_detalhado = []
+    em_fila = {}
+    for t, tp, d, f, f_ant in zip(tempo.tolist(), tipo.tolist(), doente.tolist(), fila.tolist(), fila_anterior.tolist()):
+        if f == f_ant:
+            continue
+        did = ids[d]
+        if tp == T_CHEGADA:
+            em_fila[did] = None
+            historico_doentes_fila.append((t, did, doentes[did].nome, especialidades[d], prioridades[d]))
+        else:
+            em_fila.pop(did, None)
+        historico_fila_detalhado.append((t, list(em_fila)))
+
+    if historico_fila:
+        fila_media = calcula_fila_media_tempo(historico_fila, tempo_simulacao)
+        fila_max = max(tam for _, tam in historico_fila)
+    else:
+        fila_media = 0
+        fila_max = 0
+
+    return {
+        "fila_media": fila_media,
+        "fila_max": fila_max,
+        "media_espera": float(esperas_consulta.mean()) if len(esperas_consulta) else 0,
+        "media_sistema": float(sistema.mean()) if len(sistema) else 0,
+        "doentes_atendidos": int(saida.sum()),
+        "desistencias": int(desistencia.sum()),
+        "num_eventos": int(evento.sum()),
+        "semente": meta["semente"],
+        "config": cfg,
+        "medicos": medicos,
+        "doentes": doentes,
+        "historico_fila": historico_fila,
+        "historico_doentes_fila": historico_doentes_fila,
+        "historico_fila_detalhado": historico_fila_detalhado,
+        "historico_desistencias": historico_desistencias,
+        "tempos_espera_prioridade": tempos_espera_prioridade,
+        "historico_ocupacao": historico_ocupacao,
+        "ocupacao": ocupacao_medicos.resumo(medicos),
+        "estado_doentes": estado_doentes,
+    }
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Reconstrói os resultados de uma simulação a partir do traço binário")
+    parser.add_argument("traco")
+    parser.add_argument("--graficos", action="store_true", help="mostra todos os gráficos da simulação")
+    args = parser.parse_args(argumentos)
+
+    resultados = reconstroi(args.traco)
+    print(f"Doentes atendidos: {resultados['doentes_atendidos']}")
+    print(f"Doentes que desistiram: {resultados['desistencias']}")
+    print(f"Tempo médio de espera: {resultados['media_espera']:.2f} minutos")
+    print(f"Tempo médio na clínica: {resultados['media_sistema']:.2f} minutos")
+    print(f"Tamanho médio da fila: {resultados['fila_media']:.2f}")
+    print(f"Tamanho máximo da fila: {resultados['fila_max']}")
+
+    if args.graficos:
+        from zenith import analise, graficos
+        graficos.grafico_evolucao_fila(resultados["historico_fila"])
+        graficos.grafico_ocupacao_medicos(resultados["medicos"], resultados["config"]["TEMPO_SIMULACAO"])
+        graficos.grafico_tempo_medio_espera_prioridade(analise.analisa(resultados))
+        graficos.grafico_desistencias_tempo(resultados["historico_desistencias"])
+        graficos.grafico_ocupacao_ao_longo_do_tempo(resultados["historico_ocupacao"])
+        graficos.grafico_ocupacao_especialidades(resultados["ocupacao"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+# Motor vetorial: muitas replicações ao mesmo tempo com NumPy
+#
+# Para o caso comum (cada médico tem uma só especialidade e a paciência é
+# determinística) as especialidades não interagem: cada par (replicação,
+# especialidade) é uma "via" independente com os seus médicos e os seus
+# doentes por ordem de chegada. As K·S vias avançam em passo certo:
+#   - em cada passo, cada via olha para o médico que fica livre primeiro (f);
+#   - os candidatos são os doentes por atender que já chegaram (chegada <= f)
+#     e ainda não desistiram (prazo > f, porque no mesmo instante a
+#     desistência é tratada antes da saída);
+#   - se houver candidatos, o médico chama o melhor segundo a política de
+#     despacho; senão fica parado até à chegada seguinte.
+# Com paciência determinística não é preciso simular as desistências: um
+# doente desiste se e só se não for chamado antes do seu prazo.
+#
+# Chegadas, especialidades, prioridades e durações são geradas de uma vez
+# para todas as replicações, por isso os resultados coincidem com simula()
+# em distribuição (não semente a semente). O tamanho da fila no tempo deriva
+# dos intervalos de espera de cada doente.
+#
+#   python -m zenith.vetorial --replicacoes 10000 --comparar 200
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+from zenith.demografia import Triagem, grupos_pessoas
+from zenith.replicacoes import estimativa_media
+from zenith.simulacao import PRIORIDADES, pessoas, prepara_config
+
+BLOCO = 5000    # replicações por bloco (limita a memória)
+
+GRUPOS_PESSOAS = grupos_pessoas(pessoas)
+
+METRICAS = [
+    "media_espera",
+    "media_espera_vermelho",
+    "media_espera_amarelo",
+    "media_espera_verde",
+    "media_sistema",
+    "fila_media",
+    "fila_max",
+    "doentes_atendidos",
+    "desistencias",
+    "utilizacao_media",
+    "taxa_chegada_realizada",
+    "media_tempo_consulta_realizada",
+]
+
+
+def valida_config(cfg):
+    if cfg["PACIENCIA_ALEATORIA"]:
+        raise ValueError("o motor vetorial só suporta paciência determinística")
+    if cfg["COMPETENCIAS_MEDICOS"] and any(len(c) != 1 for c in cfg["COMPETENCIAS_MEDICOS"]):
+        raise ValueError("o motor vetorial só suporta médicos com uma especialidade")
+    if cfg["POLITICA_DESPACHO"] not in ("maior_prioridade", "mais_antigo"):
+        raise ValueError(f"política de despacho desconhecida: {cfg['POLITICA_DESPACHO']}")
+
+
+# --- Geração vetorial das entradas
+
+def gera_tempos_consulta(distribuicao, media, rng, tamanho):
+    if distribuicao == "exponential":
+        return rng.exponential(media, tamanho)
+    elif distribuicao == "normal":
+        return np.maximum(0, rng.normal(media, 5, tamanho))
+    elif distribuicao == "uniform":
+        return rng.uniform(media * 0.5, media * 1.5, tamanho)
+    raise ValueError(f"distribuição desconhecida: {distribuicao}")
+
+def _chegadas(rng, k, taxa, tempo_simulacao, max_doentes):
+    media = taxa * tempo_simulacao
+    n = int(media + 8 * math.sqrt(media) + 10)
+    while True:
+        n = min(n, max_doentes)
+        tempos = np.cumsum(rng.exponential(1 / taxa, (k, n)), axis=1)
+        if n == max_doentes or (tempos[:, -1] >= tempo_simulacao).all():
+            return tempos
+        n *= 2
+
+# número de médicos de cada especialidade em cada replicação, como em simula():
+# um por especialidade (se houver médicos que cheguem) e os restantes ao acaso
+def _medicos_por_especialidade(rng, k, cfg):
+    num_esp = len(cfg["ESPECIALIDADES"])
+    if cfg["COMPETENCIAS_MEDICOS"]:
+        contagem = np.zeros(num_esp, dtype=int)
+        for competencias in cfg["COMPETENCIAS_MEDICOS"]:
+            contagem[cfg["ESPECIALIDADES"].index(competencias[0])] += 1
+        return np.tile(contagem, (k, 1))
+
+    num_medicos = cfg["NUM_MEDICOS"]
+    base = 1 if num_medicos >= num_esp else 0
+    extra = num_medicos - base * num_esp
+    contagem = np.full((k, num_esp), base, dtype=int)
+    if extra:
+        sorteio = rng.integers(0, num_esp, (k, extra))
+        for s in range(num_esp):
+            contagem[:, s] += (sorteio == s).sum(axis=1)
+    return contagem
+
+def gera_vias(cfg, k, rng):
+    especialidades = cfg["ESPECIALIDADES"]
+    num_esp = len(especialidades)
+    tempo_simulacao = cfg["TEMPO_SIMULACAO"]
+
+    tempos = _chegadas(rng, k, cfg["TAXA_CHEGADA"], tempo_simulacao, len(pessoas))
+    n = tempos.shape[1]
+    cores = list(cfg["PESOS_PRIORIDADE"])
+    if cfg["TRIAGEM_DEMOGRAFICA"]:
+        # como em simula(): doentes distintos de pessoas.json por replicação
+        grupos = rng.permuted(np.broadcast_to(GRUPOS_PESSOAS, (k, len(pessoas))), axis=1)[:, :n]
+        esp, cor = Triagem(especialidades, cfg["PESOS_PRIORIDADE"]).sorteia_varios(grupos, rng.random((k, n)))
+    else:
+        esp = rng.integers(0, num_esp, (k, n))
+        pesos = np.array(list(cfg["PESOS_PRIORIDADE"].values()), dtype=float)
+        cor = rng.choice(len(cores), size=(k, n), p=pesos / pesos.sum())
+    codigo_cor = np.array([PRIORIDADES[c] for c in cores])
+    paciencia_cor = np.array([
+        np.inf if c == "vermelho" else cfg["TEMPO_MAX_ESPERA"][c] for c in cores
+    ], dtype=float)
+    servico = gera_tempos_consulta(cfg["DISTRIBUICAO_TEMPO_CONSULTA"], cfg["TEMPO_MEDIO_CONSULTA"], rng, (k, n))
+
+    # doentes válidos, por ordem (replicação, especialidade, chegada)
+    rep, pos = np.nonzero(tempos < tempo_simulacao)
+    via = rep * num_esp + esp[rep, pos]
+    ordem = np.argsort(via, kind="stable")
+    via = via[ordem]
+    rep, pos = rep[ordem], pos[ordem]
+
+    num_vias = k * num_esp
+    por_via = np.bincount(via, minlength=num_vias)
+    largura = max(1, int(por_via.max()) if len(por_via) else 1)
+    coluna = np.arange(len(via)) - np.repeat(np.cumsum(por_via) - por_via, por_via)
+
+    def espalha(valores, vazio):
+        matriz = np.full((num_vias, largura), vazio, dtype=np.asarray(valores).dtype)
+        matriz[via, coluna] = valores
+        return matriz
+
+    t = tempos[rep, pos]
+    c = cor[rep, pos]
+    vias = {
+        "chegada": espalha(t, np.inf),
+        "prazo": espalha(t + paciencia_cor[c], np.inf),
+        "prioridade": espalha(codigo_cor[c], len(PRIORIDADES)),
+        "cor": espalha(c, -1),
+        "servico": espalha(servico[rep, pos], 0.0),
+    }
+
+    # médicos de cada via: tempo em que ficam livres (inf = não existe)
+    contagem = _medicos_por_especialidade(rng, k, cfg).reshape(num_vias)
+    num_medicos = max(1, int(contagem.max()))
+    livre = np.where(np.arange(num_medicos) < contagem[:, None], 0.0, np.inf)
+    vias["livre"] = livre
+    vias["medicos"] = contagem
+    return vias
+
+
+# --- Despacho em passo certo
+
+def despacha(chegada, prazo, chave, servico, livre):
+    num_vias, largura = chegada.shape
+    inicio = np.full((num_vias, largura), np.inf)
+    grande = np.iinfo(np.int64).max
+
+    ids = np.arange(num_vias)
+    c, p, ch, sv, lv = chegada, prazo, chave, servico, livre.copy()
+    ini = inicio.copy()
+
+    while len(ids):
+        linhas = np.arange(len(ids))
+        m = lv.argmin(axis=1)
+        f = lv[linhas, m]
+        ativo = np.isfinite(f)
+
+        # quando metade das vias já terminou, passa a trabalhar só com as restantes
+        if not ativo.all():
+            if not ativo.any():
+                break
+            if ativo.mean() < 0.5:
+                inicio[ids] = ini
+                ids = ids[ativo]
+                c, p, ch, sv, lv, ini = c[ativo], p[ativo], ch[ativo], sv[ativo], lv[ativo], ini[ativo]
+                continue
+
+        fc = f[:, None]
+        candidatos = np.isinf(ini) & (c <= fc) & (p > fc)
+        escolha = np.where(candidatos, ch, grande).argmin(axis=1)
+        atende = candidatos[linhas, escolha] & ativo
+
+        l, j = linhas[atende], escolha[atende]
+        ini[l, j] = f[atende]
+        lv[l, m[atende]] = f[atende] + sv[l, j]
+
+        # sem candidatos: o médico fica parado até à chegada seguinte (ou termina)
+        parado = ativo & ~atende
+        l = linhas[parado]
+        seguinte = (c[l] <= f[parado, None]).sum(axis=1)
+        proxima = np.full(len(l), np.inf)
+        existe = seguinte < largura
+        proxima[existe] = c[l[existe], seguinte[existe]]
+        lv[l, m[parado]] = proxima
+
+    inicio[ids] = ini
+    return inicio
+
+
+# --- Métricas por replicação
+
+def _soma_rep(valores, k):
+    return valores.reshape(k, -1).sum(axis=1)
+
+def _media(somas, contagens):
+    return np.divide(somas, contagens, out=np.zeros_like(somas, dtype=float), where=contagens > 0)
+
+def metricas_vias(cfg, k, vias, inicio):
+    tempo_simulacao = cfg["TEMPO_SIMULACAO"]
+    chegada, prazo, servico = vias["chegada"], vias["prazo"], vias["servico"]
+    num_esp = len(cfg["ESPECIALIDADES"])
+
+    real = np.isfinite(chegada)
+    c0 = np.where(real, chegada, 0.0)     # evita inf - inf nas posições vazias
+    atendido = np.isfinite(inicio)
+    desiste = real & ~atendido & np.isfinite(prazo)
+    preso = real & ~atendido & ~np.isfinite(prazo)     # vermelhos sem médico da especialidade
+    fim = np.where(atendido, inicio + servico, np.nan)
+
+    # instante do último evento de cada replicação
+    ultimo = np.fmax(
+        np.fmax(np.where(real, chegada, np.nan), fim),
+        np.where(desiste, prazo, np.nan),
+    )
+    ultimo = np.nan_to_num(np.nanmax(ultimo.reshape(k, -1), axis=1, initial=0.0))
+    ultimo_via = np.repeat(ultimo, num_esp)[:, None]
+
+    # saída da fila de espera de cada doente
+    saida_fila = np.where(atendido, inicio, np.where(desiste, prazo, np.where(preso, ultimo_via, chegada)))
+    espera_fila = np.where(real, saida_fila - c0, 0.0)
+
+    espera = np.where(atendido, inicio - c0, 0.0)
+    sistema = np.where(atendido, fim - c0, 0.0)
+    n_atendidos = _soma_rep(atendido, k)
+
+    resultados = {
+        "media_espera": _media(_soma_rep(espera, k), n_atendidos),
+        "media_sistema": _media(_soma_rep(sistema, k), n_atendidos),
+        "fila_media": _soma_rep(espera_fila, k) / tempo_simulacao,
+        "doentes_atendidos": n_atendidos,
+        "desistencias": _soma_rep(desiste, k),
+        "taxa_chegada_realizada": _soma_rep(real, k) / tempo_simulacao,
+        "media_tempo_consulta_realizada": _media(_soma_rep(np.where(atendido, servico, 0.0), k), n_atendidos),
+    }
+
+    # espera por prioridade como em tempos_espera_prioridade: atendidos e desistentes
+    espera_ou_desistencia = np.where(desiste, prazo - c0, espera)
+    conta_espera = atendido | desiste
+    cores = list(cfg["PESOS_PRIORIDADE"])
+    for i, cor in enumerate(cores):
+        da_cor = conta_espera & (vias["cor"] == i)
+        resultados[f"media_espera_{cor}"] = _media(_soma_rep(np.where(da_cor, espera_ou_desistencia, 0.0), k), _soma_rep(da_cor, k))
+
+    # tempo ocupado dentro do horizonte
+    ocupado = np.where(atendido, np.maximum(0.0, np.minimum(fim, tempo_simulacao) - np.minimum(inicio, tempo_simulacao)), 0.0)
+    medicos = vias["medicos"].reshape(k, num_esp).sum(axis=1)
+    resultados["utilizacao_media"] = _media(_soma_rep(ocupado, k), medicos * tempo_simulacao)
+
+    # fila máxima: +1 ao entrar na fila, -1 ao sair; no mesmo instante as entradas vêm primeiro
+    espera_mesmo = real & (saida_fila > chegada)
+    entradas = np.where(espera_mesmo, chegada, np.inf).reshape(k, -1)
+    saidas = np.where(espera_mesmo, saida_fila, np.inf).reshape(k, -1)
+    tempos = np.concatenate((entradas, saidas), axis=1)
+    variacao = np.concatenate((np.ones_like(entradas), -np.ones_like(saidas)), axis=1)
+    ordem = np.argsort(tempos, axis=1, kind="stable")
+    variacao = np.where(np.isfinite(np.take_along_axis(tempos, ordem, axis=1)), np.take_along_axis(variacao, ordem, axis=1), 0)
+    resultados["fila_max"] = np.maximum(np.cumsum(variacao, axis=1).max(axis=1, initial=0), 0).astype(int)
+
+    return resultados
+
+
+def simula_vetorial(config=None, replicacoes=1000, semente=0, bloco=BLOCO):
+    cfg = prepara_config(config)
+    valida_config(cfg)
+    rng = np.random.default_rng(semente)
+
+    partes = []
+    feitas = 0
+    while feitas < replicacoes:
+        k = min(bloco, replicacoes - feitas)
+        vias = gera_vias(cfg, k, rng)
+
+        if cfg["POLITICA_DESPACHO"] == "maior_prioridade":
+            chave = vias["prioridade"].astype(np.int64) * vias["chegada"].shape[1] + np.arange(vias["chegada"].shape[1])
+        else:
+            chave = np.broadcast_to(np.arange(vias["chegada"].shape[1], dtype=np.int64), vias["chegada"].shape)
+
+        inicio = despacha(vias["chegada"], vias["prazo"], chave, vias["servico"], vias["livre"])
+        partes.append(metricas_vias(cfg, k, vias, inicio))
+        feitas += k
+
+    metricas = {nome: np.concatenate([p[nome] for p in partes]) for nome in partes[0]}
+    return {"config": cfg, "replicacoes": replicacoes, "semente": semente, "metricas": metricas}
+
+def estimativas(resultado):
+    return {
+        nome: estimativa_media(valores, len(valores))
+        for nome, valores in resultado["metricas"].items()
+    }
+
+
+# --- Comparação com simula()
+
+def _metricas_simula(resultados):
+    from zenith.replicacoes import media_espera_prioridade
+
+    cfg = resultados["config"]
+    num_medicos = len(resultados["medicos"])
+    linha = {
+        "media_espera": resultados["media_espera"],
+        "media_sistema": resultados["media_sistema"],
+        "fila_media": resultados["fila_media"],
+        "fila_max": resultados["fila_max"],
+        "doentes_atendidos": resultados["doentes_atendidos"],
+        "desistencias": resultados["desistencias"],
+        "taxa_chegada_realizada": resultados["taxa_chegada_realizada"],
+        "media_tempo_consulta_realizada": resultados["media_tempo_consulta_realizada"],
+        "utilizacao_media": sum(m.total_tempo_ocupado for m in resultados["medicos"]) / (num_medicos * cfg["TEMPO_SIMULACAO"]),
+    }
+    for cor in resultados["tempos_espera_prioridade"]:
+        linha[f"media_espera_{cor}"] = media_espera_prioridade(resultados, cor)
+    return linha
+
+def compara(config=None, replicacoes=10000, replicacoes_simula=200, semente=0, trabalhadores=1):
+    from zenith.cache import simula_varios
+
+    inicio = time.perf_counter()
+    vetorial = simula_vetorial(config, replicacoes, semente)
+    tempo_vetorial = time.perf_counter() - inicio
+
+    cfg = prepara_config(config)
+    inicio = time.perf_counter()
+    execucoes = simula_varios([(cfg, semente + i) for i in range(replicacoes_simula)], trabalhadores, usar_cache=False)
+    tempo_simula = time.perf_counter() - inicio
+
+    linhas = [_metricas_simula(r) for r in execucoes]
+    referencia = {
+        nome: estimativa_media(np.array([l[nome] for l in linhas], dtype=float), len(linhas))
+        for nome in vetorial["metricas"]
+    }
+
+    return {
+        "vetorial": estimativas(vetorial),
+        "simula": referencia,
+        "replicacoes_s_vetorial": replicacoes / tempo_vetorial,
+        "replicacoes_s_simula": replicacoes_simula / tempo_simula,
+    }
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Motor vetorial: muitas replicações de uma vez")
+    parser.add_argument("--replicacoes", type=int, default=10000)
+    parser.add_argument("--medicos", type=int)
+    parser.add_argument("--taxa", type=float, help="doentes/hora")
+    parser.add_argument("--horas", type=float)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--comparar", type=int, metavar="N", default=0,
+                        help="corre também N replicações de simula() e compara")
+    args = parser.parse_args(argumentos)
+
+    config = {}
+    if args.medicos is not None:
+        config["NUM_MEDICOS"] = args.medicos
+    if args.taxa is not None:
+        config["TAXA_CHEGADA"] = args.taxa / 60
+    if args.horas is not None:
+        config["TEMPO_SIMULACAO"] = args.horas * 60
+
+    if args.comparar:
+        comparacao = compara(config, args.replicacoes, args.comparar, args.semente)
+        print(f"{'métrica':32s} {'vetorial (IC95)':>24s} {'simula (IC95)':>24s}")
+        for nome in METRICAS:
+            v = comparacao["vetorial"][nome]
+            s = comparacao["simula"][nome]
+            print(
+                f"{nome:32s} {v['media']:12.3f} ± {v['semi_amplitude_ic95']:8.3f} "
+                f"{s['media']:12.3f} ± {s['semi_amplitude_ic95']:8.3f}"
+            )
+        print(
+            f"\nReplicações/s: vetorial {comparacao['replicacoes_s_vetorial']:.0f} | "
+            f"simula {comparacao['replicacoes_s_simula']:.0f} "
+            f"({comparacao['replicacoes_s_vetorial'] / comparacao['replicacoes_s_simula']:.0f}×)"
+        )
+    else:
+        inicio = time.perf_counter()
+        resultado = simula_vetorial(config, args.replicacoes, args.semente)
+        duracao = time.perf_counter() - inicio
+        for nome, e in estimativas(resultado).items():
+            print(f"{nome:32s} {e['media']:12.3f} ± {e['semi_amplitude_ic95']:8.3f}")
+        print(f"\n{args.replicacoes} replicações em {duracao:.2f} s ({args.replicacoes / duracao:.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()